@@ -0,0 +1,159 @@
+import hashlib
+from datetime import timezone
+from functools import wraps
+from flask import current_app, request, make_response
+from sqlalchemy import event, select, func, update
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from extensions import db
+from models.table_version import TableVersion
+
+UPSERTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+_versioned = set()
+_commit_hooks = {}
+
+
+def versioned(model):
+    """Bump ``model``'s table_version row after every commit that writes it."""
+    _versioned.add(model)
+
+
+def collection_version(model):
+    """(None, seed) of a versioned table.
+
+    The seed combines max(updated_at), which comes off its index and moves
+    on inserts and updates, with the table_version generation, which moves
+    after every committed write, deletes too. Neither reads the table itself.
+    There is no Last-Modified: a delete leaves every remaining timestamp
+    as it was, so If-Modified-Since could not see it and only the ETag
+    validates a collection.
+    """
+    last_modified, generation = db.session.execute(select(
+        select(func.max(model.updated_at)).scalar_subquery(),
+        select(TableVersion.version).where(TableVersion.name == model.__tablename__).scalar_subquery(),
+    )).one()
+    return None, f"{last_modified.isoformat() if last_modified else ''}:{generation or 0}"
+
+
+def bump_versions(connection, names):
+    insert = UPSERTS.get(connection.dialect.name)
+    if insert is None:
+        # Rows for the known tables are created by the table_version migration.
+        connection.execute(update(TableVersion)
+                           .where(TableVersion.name.in_(names))
+                           .values(version=TableVersion.version + 1))
+        return
+    stmt = insert(TableVersion).values([{"name": name, "version": 1} for name in sorted(names)])
+    connection.execute(stmt.on_conflict_do_update(
+        index_elements=[TableVersion.name],
+        set_={"version": TableVersion.version + 1},
+    ))
+
+
+def on_commit(model, hook):
+    """Call ``hook()`` after every commit that wrote ``model``'s table."""
+    versioned(model)
+    _commit_hooks.setdefault(model.__tablename__, []).append(hook)
+
+
+def mark_written(session, model):
+    session.info.setdefault("written_tables", set()).add(model.__tablename__)
+
+
+@event.listens_for(Session, "after_flush")
+def track_flushed_writes(session, flush_context):
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if type(obj) in _versioned:
+            mark_written(session, type(obj))
+
+
+@event.listens_for(Session, "do_orm_execute")
+def track_bulk_writes(orm_execute_state):
+    if orm_execute_state.is_select:
+        return
+    mapper = orm_execute_state.bind_mapper
+    if mapper is not None and mapper.class_ in _versioned:
+        mark_written(orm_execute_state.session, mapper.class_)
+
+
+@event.listens_for(Session, "after_commit")
+def bump_on_commit(session):
+    names = session.info.pop("written_tables", None)
+    if not names:
+        return
+    # A transaction of its own: bumping inside the writer's would hold the
+    # table_version row lock until it commits and queue every other writer
+    # of the table behind it.
+    try:
+        with session.get_bind(mapper=TableVersion).begin() as connection:
+            bump_versions(connection, names)
+    except SQLAlchemyError:
+        # The write itself is committed; failing the request now would only
+        # invite a retry that repeats it.
+        current_app.logger.exception("Could not bump table versions for %s", ", ".join(sorted(names)))
+    for name in sorted(names):
+        for hook in _commit_hooks.get(name, ()):
+            hook()
+
+
+@event.listens_for(Session, "after_rollback")
+def forget_writes(session):
+    session.info.pop("written_tables", None)
+
+
+def row_version(model, id):
+    row = db.session.execute(
+        select(model.updated_at).where(model.id == id)
+    ).first()
+    if row is None:
+        return None
+    return row.updated_at, row.updated_at.isoformat() if row.updated_at else ""
+
+
+def make_etag(seed):
+    # The same rows look different per endpoint and query string, so both
+    # are part of the tag.
+    raw = f"{request.endpoint}|{request.query_string.decode()}|{seed}"
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+
+def is_fresh(etag, last_modified):
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(etag)
+    if request.if_modified_since and last_modified:
+        modified = last_modified.replace(tzinfo=timezone.utc, microsecond=0)
+        return modified <= request.if_modified_since
+    return False
+
+
+def conditional(version):
+    """Answer GETs with a 304 when the client's ETag/Last-Modified still match.
+
+    ``version`` gets the view arguments and returns (last_modified, seed), or
+    None to skip validation (for example when the row does not exist). The
+    check runs before the view, so unchanged resources are never serialized.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            validators = version(**kwargs)
+            if validators is None:
+                return view(*args, **kwargs)
+
+            last_modified, seed = validators
+            etag = make_etag(seed)
+            if is_fresh(etag, last_modified):
+                response = make_response("", 304)
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+
+            response.set_etag(etag, weak=True)
+            if last_modified:
+                response.last_modified = last_modified.replace(tzinfo=timezone.utc)
+            return response
+        return wrapper
+    return decorator
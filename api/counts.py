@@ -0,0 +1,62 @@
+import threading, time
+from sqlalchemy import text
+from extensions import db
+from models.data import Data
+from api.conditional import on_commit
+
+COUNT_CACHE_TTL = 60
+COUNT_CACHE_SIZE = 1024
+
+_counts = {}
+_generation = 0
+_lock = threading.Lock()
+
+
+def invalidate_counts():
+    global _generation
+    with _lock:
+        _counts.clear()
+        _generation += 1
+
+
+def cached_count(query, search):
+    """COUNT(*) of a filtered Data query, cached per database and search term.
+
+    Entries are dropped whenever a Data write commits in this process and
+    expire after COUNT_CACHE_TTL seconds to pick up writes from other workers.
+    """
+    # Keyed on the exact term apply_search filtered on: case and inner
+    # whitespace can change what ILIKE or the FTS phrase matches. Apps on
+    # other databases in the same process (tests, the plan check's scratch
+    # database) get their own entries.
+    key = (str(db.engine.url), search.strip())
+    now = time.monotonic()
+    with _lock:
+        hit = _counts.get(key)
+        generation = _generation
+    if hit and hit[1] > now:
+        return hit[0]
+
+    total = query.order_by(None).count()
+
+    with _lock:
+        # A write committed while we were counting, so this total may be stale.
+        if generation == _generation:
+            if len(_counts) >= COUNT_CACHE_SIZE:
+                _counts.clear()
+            _counts[key] = (total, now + COUNT_CACHE_TTL)
+    return total
+
+
+def estimated_total():
+    """Planner row estimate for the whole data table, or None if unavailable."""
+    if db.engine.dialect.name != "postgresql":
+        return None
+    estimate = db.session.execute(
+        text("SELECT reltuples::bigint FROM pg_class WHERE oid = 'data'::regclass")
+    ).scalar()
+    # reltuples is -1 until the table has been vacuumed or analyzed.
+    return estimate if estimate is not None and estimate >= 0 else None
+
+
+on_commit(Data, invalidate_counts)
@@ -1,50 +1,118 @@
-from flask import Blueprint, request, jsonify
+import base64, csv, io, json, math
+from datetime import datetime
+from sqlalchemy import insert, update, delete, select
+from flask import Blueprint, request, jsonify, current_app, Response, stream_with_context
 from flask_jwt_extended import jwt_required
 from extensions import db
+from extensions.query_budget import query_budget
 from models.data import Data
 from schema.data import DataSchema
+from api.search import apply_search, probe_search_backend
+from api.importer import UnreadableFile, detect_format, import_stream
+from api.counts import cached_count, estimated_total
+from api.conditional import conditional, collection_version, row_version, versioned
+from api.serializers import DATA_FIELDS, DATA_LIST_FIELDS, DATA_DETAIL_FIELDS, field_names, serialize, serialize_rows
 
 data_bp = Blueprint("api", __name__)
 data_schema = DataSchema()
+bulk_create_schema = DataSchema(many=True)
+bulk_update_schema = DataSchema(many=True, partial=True)
+
+MAX_PER_PAGE = 100
+BULK_MAX_OPERATIONS = 10000
+BULK_CHUNK = 500
+
+versioned(Data)
+
+
+@data_bp.record_once
+def check_search_backend(state):
+    probe_search_backend(state.app)
+
+
+def encode_cursor(last_id):
+    raw = json.dumps({"id": last_id}).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(token):
+    padded = token + "=" * (-len(token) % 4)
+    try:
+        return int(json.loads(base64.urlsafe_b64decode(padded))["id"])
+    except (ValueError, TypeError, KeyError):
+        raise ValueError("Invalid cursor")
+
+
+def cursor_page(query, per_page, after=None, before=None):
+    """Keyset pagination on Data.id, no OFFSET scan and no COUNT(*)."""
+    if before is not None:
+        rows = (query.filter(Data.id < decode_cursor(before))
+                     .order_by(Data.id.desc())
+                     .limit(per_page + 1).all())
+        has_more = len(rows) > per_page
+        rows = list(reversed(rows[:per_page]))
+        next_cursor = encode_cursor(rows[-1].id) if rows else None
+        prev_cursor = encode_cursor(rows[0].id) if rows and has_more else None
+    else:
+        if after is not None:
+            query = query.filter(Data.id > decode_cursor(after))
+        rows = query.order_by(Data.id.asc()).limit(per_page + 1).all()
+        has_more = len(rows) > per_page
+        rows = rows[:per_page]
+        next_cursor = encode_cursor(rows[-1].id) if rows and has_more else None
+        prev_cursor = encode_cursor(rows[0].id) if rows and after is not None else None
+    return rows, next_cursor, prev_cursor
 
 @data_bp.route("/data", methods=["GET"])
 @jwt_required()
+@query_budget(3)
+@conditional(lambda: collection_version(Data))
 def get_data():
     try:
         page = int(request.args.get("page", 1))
         per_page = int(request.args.get("per_page", 5))
     except ValueError:
         return jsonify({"error": "Page number must be an integer"}), 400
+    if not 1 <= per_page <= MAX_PER_PAGE:
+        return jsonify({"error": f"per_page must be between 1 and {MAX_PER_PAGE}"}), 400
 
     search = request.args.get("search", "").strip()
-    query = Data.query
+    query = apply_search(Data.query, search)
+    rows_query = query.with_entities(*DATA_LIST_FIELDS)
+
+    after = request.args.get("after")
+    before = request.args.get("before")
+    if request.args.get("paginate") == "cursor" or after or before:
+        try:
+            rows, next_cursor, prev_cursor = cursor_page(rows_query, per_page, after, before)
+        except ValueError as err:
+            return jsonify({"error": str(err)}), 400
+
+        return jsonify({
+            "per_page": per_page,
+            "next_cursor": next_cursor,
+            "prev_cursor": prev_cursor,
+            "data": serialize_rows(rows, DATA_LIST_FIELDS)
+        }), 200
 
-    if search:
-        from sqlalchemy import or_
-        query = query.filter(
-            or_(
-                Data.name.ilike(f"%{search}%"),
-                Data.age.cast(db.String).like(f"%{search}%")
-            )
-        )
+    approx = request.args.get("approx_count", "").lower() in ("1", "true", "yes")
+    total = estimated_total() if approx and not search else None
+    approximate = total is not None
+    if total is None:
+        total = cached_count(query, search)
 
-    query = query.order_by(Data.id.asc())
-    data = query.paginate(page=page, per_page=per_page, error_out=False)
+    rows_query = rows_query.order_by(Data.id.asc())
+    data = rows_query.paginate(page=page, per_page=per_page, error_out=False, count=False)
 
     result = {
         "page": data.page,
         "per_page": data.per_page,
-        "total_item": data.total,
-        "total_page": data.pages,
-        "data": [
-            {
-                "id": d.id,
-                "name": d.name,
-                "age": d.age,
-                "created_at" : d.created_at
-            } for d in data.items
-        ]
+        "total_item": total,
+        "total_page": math.ceil(total / data.per_page),
+        "data": serialize_rows(data.items, DATA_LIST_FIELDS)
     }
+    if approx:
+        result["approximate"] = approximate
     return jsonify(result), 200
 
 
@@ -52,20 +120,21 @@ def get_data():
 
 @data_bp.route("/data/<int:id>", methods=["GET"])
 @jwt_required()
+@query_budget(2)
+@conditional(lambda id: row_version(Data, id))
 def get(id):
-    data = Data.query.get(id)
+    data = Data.query.with_entities(*DATA_FIELDS).filter(Data.id == id).first()
     if not data:
         return jsonify({"error": f"Data {id} you need not found"}), 404
     
-    return jsonify({
-                     "id": data.id,
-                     "name": data.name,
-                     "age": data.age
-                    }), 200
+    return jsonify(serialize(data, DATA_FIELDS)), 200
 
 
 @data_bp.route("/data", methods=["POST"])
 @jwt_required()
+# The INSERT, the table_version bump every committed write makes, and the
+# reload of the expired row for the response.
+@query_budget(3)
 def add_data():
     
     data = request.get_json() if request.is_json else request.form.to_dict()
@@ -85,18 +154,15 @@ def add_data():
     return jsonify({
          "status": "success",
          "message" : f"Data {new_record} added",
-         "data": {
-             "id": new_record.id,
-             "name": new_record.name,
-             "age": new_record.age,
-             "created_at": new_record.created_at
-         }
+         "data": serialize(new_record, DATA_LIST_FIELDS)
         }), 201
 
 
 
 @data_bp.route("/data/<int:id>", methods=["PUT"])
 @jwt_required()
+# Lookup, UPDATE, table_version bump and the post-commit reload.
+@query_budget(4)
 def update_data(id):
     record = Data.query.get(id)
 
@@ -110,19 +176,14 @@ def update_data(id):
     return jsonify({
         "status" : "success",
         "message": f"Data {id} updated successfully",
-        "data" : {
-            "id": record.id,
-             "name": record.name,
-             "age": record.age,
-             "created_at": record.created_at,
-             "updated_at": record.updated_at
-        }
+        "data" : serialize(record, DATA_DETAIL_FIELDS)
         }), 200
 
 
 
 @data_bp.route("/data/<int:id>", methods=["DELETE"])
 @jwt_required()
+@query_budget(3)
 def delete_data(id):
     data = Data.query.get(id)
 
@@ -134,91 +195,222 @@ def delete_data(id):
     return jsonify({
         "message": "Data deleted successfully",
         "status" : "success",
-        "data" : {
-            "id" : data.id,
-            "name" :data.name,
-            "age" : data.age,
-            "created_at" : data.created_at,
-            "updated_at" :data.updated_at
-        }
+        "data" : serialize(data, DATA_DETAIL_FIELDS)
         }), 200
 
 
 
-@data_bp.route("/data/export", methods=["GET"])
-@jwt_required()
-def export_data():
-    search = request.args.get("search", "").strip()
-    query = Data.query
-
-    if search:
-        from sqlalchemy import or_
-        query = query.filter(
-            or_(
-                Data.name.ilike(f"%{search}%"),
-                Data.age.cast(db.String).like(f"%{search}%")
-            )
-        )
-
-    query = query.order_by(Data.id.asc())
-    data = query.all()
-
-    result = [
-        {"id": d.id, "name": d.name, "age": d.age}
-        for d in data
-    ]
-    return jsonify(result), 200
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
+EXPORT_COLUMNS = field_names(DATA_FIELDS)
+EXPORT_CHUNK = 1000
+EXPORT_FORMATS = {
+    "json": "application/json",
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
 
 
+def export_chunks(rows, fmt):
+    """Turn a row iterator into buffered text chunks of EXPORT_CHUNK rows."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer) if fmt == "csv" else None
+    dumps = current_app.json.dumps
+    count = 0
 
+    if fmt == "csv":
+        writer.writerow(EXPORT_COLUMNS)
+    elif fmt == "json":
+        buffer.write("[")
 
+    for row in rows:
+        if fmt == "csv":
+            writer.writerow(row)
+        else:
+            item = dumps(dict(zip(EXPORT_COLUMNS, row)), sort_keys=False)
+            if fmt == "ndjson":
+                buffer.write(item + "\n")
+            else:
+                buffer.write(("," if count else "") + item)
+        count += 1
 
+        if count % EXPORT_CHUNK == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
 
+    if fmt == "json":
+        buffer.write("]")
+    yield buffer.getvalue()
 
 
+@data_bp.route("/data/export", methods=["GET"])
+@jwt_required()
+def export_data():
+    fmt = request.args.get("format", "json").lower()
+    if fmt not in EXPORT_FORMATS:
+        return jsonify({"error": f"Format must be one of {', '.join(EXPORT_FORMATS)}"}), 400
 
+    search = request.args.get("search", "").strip()
+    query = apply_search(Data.query, search)
 
+    # yield_per keeps only one chunk of rows in memory (a server-side cursor on
+    # PostgreSQL), and with_entities skips building full ORM objects.
+    rows = (query.order_by(Data.id.asc())
+                 .with_entities(*DATA_FIELDS)
+                 .yield_per(EXPORT_CHUNK))
 
+    response = Response(
+        stream_with_context(export_chunks(rows, fmt)),
+        mimetype=EXPORT_FORMATS[fmt],
+    )
+    if fmt != "json":
+        response.headers["Content-Disposition"] = f"attachment; filename=data.{fmt}"
+    return response, 200
 
 
 
+def chunked(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
 
 
+def existing_ids(ids):
+    found = set()
+    for chunk in chunked(sorted(ids), BULK_CHUNK):
+        found.update(db.session.scalars(select(Data.id).where(Data.id.in_(chunk))))
+    return found
 
 
+@data_bp.route("/data/bulk", methods=["POST"])
+@jwt_required()
+def bulk_data():
+    """Apply many create/update/delete operations in a single transaction.
+
+    Body: {"operations": [{"op": "create", "data": {...}},
+                          {"op": "update", "id": 1, "data": {...}},
+                          {"op": "delete", "id": 2}]}
+    Invalid items are reported in "results" and skipped, the rest are written
+    with batched executemany statements and one commit.
+    """
+    payload = request.get_json(silent=True)
+    operations = payload.get("operations") if isinstance(payload, dict) else None
+    if not isinstance(operations, list) or not operations:
+        return jsonify({"error": "operations must be a non-empty list"}), 400
+    if len(operations) > BULK_MAX_OPERATIONS:
+        return jsonify({"error": f"Max {BULK_MAX_OPERATIONS} operations per request"}), 400
+
+    results = [None] * len(operations)
+    creates, updates, deletes = [], [], []
+    seen_ids = {}
+
+    for index, item in enumerate(operations):
+        op = item.get("op") if isinstance(item, dict) else None
+        if op not in ("create", "update", "delete"):
+            results[index] = {"index": index, "status": 400, "error": "op must be create, update or delete"}
+            continue
+        if op == "create":
+            creates.append((index, item.get("data") or {}))
+            continue
+
+        record_id = item.get("id")
+        if not isinstance(record_id, int) or isinstance(record_id, bool):
+            results[index] = {"index": index, "op": op, "status": 400, "error": "id must be an integer"}
+            continue
+        if record_id in seen_ids:
+            results[index] = {"index": index, "op": op, "id": record_id, "status": 409,
+                              "error": f"Data {record_id} appears more than once in this batch"}
+            continue
+        seen_ids[record_id] = index
+
+        if op == "update":
+            updates.append((index, record_id, item.get("data") or {}))
+        else:
+            deletes.append((index, record_id))
+
+    create_errors = bulk_create_schema.validate([data for _, data in creates])
+    update_errors = bulk_update_schema.validate([data for _, _, data in updates])
+    found = existing_ids(seen_ids)
+
+    new_rows, new_indexes = [], []
+    for position, (index, data) in enumerate(creates):
+        if position in create_errors:
+            results[index] = {"index": index, "op": "create", "status": 400, "errors": create_errors[position]}
+            continue
+        new_rows.append({"name": data["name"], "age": int(data["age"])})
+        new_indexes.append(index)
+
+    now = datetime.utcnow()
+    changed_rows = []
+    for position, (index, record_id, data) in enumerate(updates):
+        if position in update_errors:
+            results[index] = {"index": index, "op": "update", "id": record_id, "status": 400,
+                              "errors": update_errors[position]}
+            continue
+        if record_id not in found:
+            results[index] = {"index": index, "op": "update", "id": record_id, "status": 404,
+                              "error": f"Data {record_id} you need to Update not found"}
+            continue
+        row = {"id": record_id, "updated_at": now}
+        if "name" in data:
+            row["name"] = data["name"]
+        if "age" in data:
+            row["age"] = int(data["age"])
+        changed_rows.append(row)
+        results[index] = {"index": index, "op": "update", "id": record_id, "status": 200}
+
+    removed_ids = []
+    for index, record_id in deletes:
+        if record_id not in found:
+            results[index] = {"index": index, "op": "delete", "id": record_id, "status": 404,
+                              "error": f"Data {record_id} you need to Delete, not found"}
+            continue
+        removed_ids.append(record_id)
+        results[index] = {"index": index, "op": "delete", "id": record_id, "status": 200}
+
+    for chunk, indexes in zip(chunked(new_rows, BULK_CHUNK), chunked(new_indexes, BULK_CHUNK)):
+        ids = db.session.scalars(
+            insert(Data).returning(Data.id, sort_by_parameter_order=True), chunk
+        ).all()
+        for index, new_id in zip(indexes, ids):
+            results[index] = {"index": index, "op": "create", "id": new_id, "status": 201}
+    for chunk in chunked(changed_rows, BULK_CHUNK):
+        db.session.execute(update(Data), chunk)
+    for chunk in chunked(removed_ids, BULK_CHUNK):
+        db.session.execute(delete(Data).where(Data.id.in_(chunk)))
+    db.session.commit()
 
+    written = sum(1 for r in results if r["status"] < 300)
+    return jsonify({
+        "status": "success" if written == len(results) else "partial",
+        "created": len(new_rows),
+        "updated": len(changed_rows),
+        "deleted": len(removed_ids),
+        "results": results
+    }), 200
 
 
+@data_bp.route("/data/import", methods=["POST"])
+@jwt_required()
+def import_data():
+    upload = request.files.get("file")
+    if not upload:
+        return jsonify({"error": "Upload a csv or ndjson file as 'file'"}), 400
 
+    fmt = detect_format(upload.filename, request.args.get("format"))
+    if not fmt:
+        return jsonify({"error": "Format must be csv or ndjson"}), 400
 
+    try:
+        imported, failed, errors = import_stream(upload.stream, fmt)
+    except UnreadableFile as err:
+        return jsonify({
+            "status": "error",
+            "imported": 0,
+            "errors": [{"line": err.line_number, "errors": {"_file": [str(err)]}}]
+        }), 400
 
+    return jsonify({
+        "status": "success" if not failed else "partial",
+        "imported": imported,
+        "failed": failed,
+        "errors": errors
+    }), 200
@@ -0,0 +1,107 @@
+import importlib.util, os, threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from flask import current_app
+from werkzeug.security import safe_join
+
+# Pillow is optional (requirements-optional.txt); without it only originals
+# are served and a warning is logged at startup. It is imported on the first
+# resize, not at startup.
+HAS_PILLOW = importlib.util.find_spec("PIL") is not None
+
+IMAGE_WIDTHS = {"thumb": 160, "card": 480, "full": 1280}
+IMAGE_WORKERS = 2
+JPEG_QUALITY = 85
+WEBP_QUALITY = 80
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=IMAGE_WORKERS, thread_name_prefix="images")
+        return _executor
+
+
+def variant_name(filename, width, ext=None):
+    stem, original_ext = filename.rsplit(".", 1)
+    return f"{stem}_{width}.{ext or original_ext}"
+
+
+def save_atomic(image, path, **options):
+    # Readers never see a half-written variant: write aside, then rename.
+    tmp_path = f"{path}.tmp"
+    image.save(tmp_path, **options)
+    os.replace(tmp_path, path)
+
+
+def build_variants(folder, filename):
+    """Write a resized copy and a WebP copy of an upload for every IMAGE_WIDTHS entry."""
+    from PIL import Image, ImageOps
+
+    created = []
+    ext = filename.rsplit(".", 1)[1].lower()
+    with Image.open(os.path.join(folder, filename)) as source:
+        source = ImageOps.exif_transpose(source)
+        for width in sorted(IMAGE_WIDTHS.values()):
+            # Originals are never upscaled. When they are already small enough
+            # only the WebP copy is written and the original serves that width.
+            # Other formats (gif, webp, avif) only get the WebP variant.
+            if source.width > width:
+                height = max(1, round(source.height * width / source.width))
+                resized = source.resize((width, height), Image.LANCZOS)
+                name = variant_name(filename, width)
+                if ext in ("jpg", "jpeg"):
+                    save_atomic(resized.convert("RGB"), os.path.join(folder, name),
+                                format="JPEG", quality=JPEG_QUALITY, optimize=True, progressive=True)
+                    created.append(name)
+                elif ext == "png":
+                    save_atomic(resized, os.path.join(folder, name), format="PNG", optimize=True)
+                    created.append(name)
+            else:
+                resized = source
+
+            name = variant_name(filename, width, "webp")
+            save_atomic(resized, os.path.join(folder, name), format="WEBP", quality=WEBP_QUALITY, method=4)
+            created.append(name)
+    return created
+
+
+def log_failure(logger, filename, future):
+    if not future.cancelled() and future.exception() is not None:
+        logger.error("Building variants for %s failed", filename, exc_info=future.exception())
+
+
+def schedule_variants(folder, filename):
+    """Resize an upload on the image pool so the request worker returns right away."""
+    if not HAS_PILLOW or not filename:
+        return None
+    future = get_executor().submit(build_variants, folder, filename)
+    # Nobody waits on the future; without this a failed resize is silent.
+    future.add_done_callback(partial(log_failure, current_app.logger, filename))
+    return future
+
+
+def pick_variant(folder, filename, width, accept_webp=False):
+    """Name of the best existing file for ``?w=width``, or the original.
+
+    Picks the smallest configured width that covers the request (the largest
+    one if none does), WebP first when the client accepts it. Variants that
+    are still being built fall back to the original upload.
+    """
+    if "." not in filename:
+        return filename
+    widths = sorted(IMAGE_WIDTHS.values())
+    target = next((w for w in widths if w >= width), widths[-1])
+
+    candidates = [variant_name(filename, target)]
+    if accept_webp:
+        candidates.insert(0, variant_name(filename, target, "webp"))
+    for name in candidates:
+        path = safe_join(folder, name)
+        if path and os.path.exists(path):
+            return name
+    return filename
@@ -0,0 +1,154 @@
+import csv, io, json
+from datetime import datetime
+from marshmallow import EXCLUDE
+from sqlalchemy import insert
+from extensions import db
+from models.data import Data
+from schema.data import DataSchema
+from api.conditional import mark_written
+
+IMPORT_CHUNK = 5000
+IMPORT_MAX_ERRORS = 1000
+IMPORT_FORMATS = {"csv", "ndjson"}
+
+import_schema = DataSchema(many=True, unknown=EXCLUDE)
+
+
+def detect_format(filename, requested=None):
+    fmt = (requested or "").lower()
+    if not fmt and filename and "." in filename:
+        fmt = filename.rsplit(".", 1)[1].lower()
+        fmt = {"jsonl": "ndjson", "json": "ndjson"}.get(fmt, fmt)
+    return fmt if fmt in IMPORT_FORMATS else None
+
+
+class UnreadableFile(ValueError):
+    """The upload is not UTF-8 text or not parsable CSV from ``line_number`` on."""
+
+    def __init__(self, line_number, message):
+        super().__init__(message)
+        self.line_number = line_number
+
+
+def decoded_lines(stream):
+    """Yield the upload's lines as text, decoding one line at a time.
+
+    Unlike a TextIOWrapper, which decodes in blocks, this can name the line
+    holding an invalid byte.
+    """
+    for line_number, raw in enumerate(stream, start=1):
+        try:
+            yield raw.decode("utf-8-sig" if line_number == 1 else "utf-8")
+        except UnicodeDecodeError:
+            raise UnreadableFile(line_number, "File is not UTF-8 encoded.")
+
+
+def read_records(stream, fmt):
+    """Yield (line_number, record) pairs; record is None for unparsable lines.
+
+    Raises UnreadableFile when the rest of the file cannot be read.
+    """
+    lines = decoded_lines(stream)
+
+    if fmt == "csv":
+        reader = csv.DictReader(lines)
+        try:
+            for record in reader:
+                yield reader.line_num, record
+        except csv.Error as err:
+            # DictReader.line_num is only updated once a row parses.
+            raise UnreadableFile(reader.reader.line_num, f"Malformed CSV: {err}.")
+        return
+
+    for line_number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            record = None
+        yield line_number, record if isinstance(record, dict) else None
+
+
+def copy_rows(rows):
+    """Load rows with COPY FROM STDIN over the session's psycopg2 connection."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow((row["name"], row["age"], row["created_at"], row["updated_at"]))
+    buffer.seek(0)
+
+    cursor = db.session.connection().connection.cursor()
+    try:
+        cursor.copy_expert(
+            "COPY data (name, age, created_at, updated_at) FROM STDIN WITH (FORMAT csv)",
+            buffer,
+        )
+    finally:
+        cursor.close()
+    # COPY bypasses the ORM events, so record the write by hand.
+    mark_written(db.session, Data)
+
+
+def load_rows(rows):
+    if not rows:
+        return
+    dialect = db.engine.dialect
+    if dialect.name == "postgresql" and dialect.driver == "psycopg2":
+        copy_rows(rows)
+    else:
+        db.session.execute(insert(Data), rows)
+
+
+def import_stream(stream, fmt):
+    """Validate and load an uploaded file chunk by chunk in one transaction.
+
+    Only IMPORT_CHUNK records are held in memory at a time. Returns the number
+    of imported rows, the number of rejected lines and up to IMPORT_MAX_ERRORS
+    per-line error entries. A file that stops being readable part way raises
+    UnreadableFile with nothing written.
+    """
+    imported, failed, errors = 0, 0, []
+
+    def reject(line_number, messages):
+        nonlocal failed
+        failed += 1
+        if len(errors) < IMPORT_MAX_ERRORS:
+            errors.append({"line": line_number, "errors": messages})
+
+    def flush(chunk):
+        nonlocal imported
+        chunk_errors = import_schema.validate([record for _, record in chunk])
+        now = datetime.utcnow()
+        rows = []
+        for position, (line_number, record) in enumerate(chunk):
+            if position in chunk_errors:
+                reject(line_number, chunk_errors[position])
+                continue
+            rows.append({
+                "name": record["name"],
+                "age": int(record["age"]),
+                "created_at": now,
+                "updated_at": now,
+            })
+        load_rows(rows)
+        imported += len(rows)
+
+    chunk = []
+    try:
+        for line_number, record in read_records(stream, fmt):
+            if record is None:
+                reject(line_number, {"_line": ["Could not parse line."]})
+                continue
+            chunk.append((line_number, record))
+            if len(chunk) >= IMPORT_CHUNK:
+                flush(chunk)
+                chunk = []
+    except UnreadableFile:
+        # Earlier chunks are already flushed; none of the file is imported.
+        db.session.rollback()
+        raise
+    flush(chunk)
+
+    db.session.commit()
+    return imported, failed, errors
@@ -0,0 +1,66 @@
+import re
+from flask import current_app
+from sqlalchemy import select, table, literal_column, text
+from sqlalchemy.engine import make_url
+from extensions import db
+from models.data import Data
+
+AGE_RANGE = re.compile(r"^(\d{1,3})\s*-\s*(\d{1,3})$")
+TRIGRAM_MIN = 3
+
+def probe_search_backend(app):
+    """Record whether the data_fts table from the search migration exists.
+
+    Checked once while the app is built, so requests never pay for it; an
+    app started before that migration ran keeps LIKE until it restarts.
+    """
+    available = False
+    if make_url(app.config["SQLALCHEMY_DATABASE_URI"]).get_backend_name() == "sqlite":
+        with app.app_context(), db.engine.connect() as conn:
+            available = conn.execute(
+                text("SELECT 1 FROM sqlite_master WHERE type='table' AND name='data_fts'")
+            ).first() is not None
+    app.extensions["search"] = {"sqlite_fts": available}
+
+
+def sqlite_fts_available():
+    return current_app.extensions["search"]["sqlite_fts"]
+
+
+def name_predicate(term):
+    dialect = db.engine.dialect.name
+
+    # On SQLite the FTS5 trigram table answers substring matches from its index.
+    # Shorter terms have no trigram to look up, so they keep the plain LIKE.
+    if dialect == "sqlite" and len(term) >= TRIGRAM_MIN and sqlite_fts_available():
+        phrase = '"' + term.replace('"', '""') + '"'
+        matches = (
+            select(literal_column("rowid"))
+            .select_from(table("data_fts"))
+            .where(text("data_fts MATCH :phrase").bindparams(phrase=phrase))
+        )
+        return Data.id.in_(matches)
+
+    # On PostgreSQL ILIKE is served by the ix_data_name_trgm GIN index.
+    return Data.name.ilike(f"%{term}%")
+
+
+def apply_search(query, search):
+    """Shared search planner for the data listing and export endpoints.
+
+    Numbers are matched against age exactly ("42") or as a range ("20-30"),
+    anything else is a case-insensitive substring match on name.
+    """
+    search = search.strip()
+    if not search:
+        return query
+
+    if search.isdigit():
+        return query.filter(Data.age == int(search))
+
+    match = AGE_RANGE.match(search)
+    if match:
+        low, high = sorted(int(v) for v in match.groups())
+        return query.filter(Data.age.between(low, high))
+
+    return query.filter(name_predicate(search))
@@ -0,0 +1,27 @@
+from models.data import Data
+from models.service import Service
+from models.user import User
+
+# Column tuples double as the with_entities() argument and the dict keys,
+# so listings fetch exactly what they emit instead of whole ORM objects.
+DATA_FIELDS = (Data.id, Data.name, Data.age)
+DATA_LIST_FIELDS = DATA_FIELDS + (Data.created_at,)
+DATA_DETAIL_FIELDS = DATA_LIST_FIELDS + (Data.updated_at,)
+SERVICE_FIELDS = (Service.id, Service.image, Service.service, Service.price,
+                  Service.created_at, Service.updated_at)
+USER_FIELDS = (User.id, User.name, User.email, User.phone)
+
+
+def field_names(fields):
+    return tuple(column.key for column in fields)
+
+
+def serialize(row, fields):
+    """Dict of ``fields`` from an ORM object or a with_entities row."""
+    return {column.key: getattr(row, column.key) for column in fields}
+
+
+def serialize_rows(rows, fields):
+    """Dicts for with_entities(*fields) rows, in column order."""
+    names = field_names(fields)
+    return [dict(zip(names, row)) for row in rows]
@@ -1,35 +1,86 @@
-import os, uuid
-from flask import Blueprint, request, jsonify, send_from_directory
+import os
+import click
+from flask import Blueprint, g, request, jsonify, current_app
 from flask_jwt_extended import jwt_required
 from werkzeug.utils import secure_filename
 from marshmallow import ValidationError
-from extensions import db
+from werkzeug.exceptions import RequestEntityTooLarge
+from extensions import db, cache
+from extensions.assets import send_asset
+from extensions.routing import pin_primary
+from extensions.query_budget import query_budget
+from api.serializers import SERVICE_FIELDS, serialize, serialize_rows
 from models.service import Service
 from schema.service import ServiceSchema
+from api.conditional import conditional, collection_version, row_version, versioned, on_commit
+from api.images import HAS_PILLOW, schedule_variants, pick_variant
+from api.storage import store_upload, release_image, streamed_upload, InvalidUpload, scan_uploads, collect_garbage, sweep_forever, GC_GRACE_SECONDS
 
-service_bp = Blueprint("service", __name__)
+service_bp = Blueprint("service", __name__, cli_group="uploads")
 service_schema = ServiceSchema()
 
 UPLOAD_FOLDER = "uploads/services"
 ALLOWED_EXTENSIONS = {"png", "jpg", "jpeg"}
 MAX_FILE_SIZE_MB = 2
-os.makedirs(UPLOAD_FOLDER, exist_ok=True)
+
+
+@service_bp.record_once
+def create_upload_folder(state):
+    os.makedirs(UPLOAD_FOLDER, exist_ok=True)
+
+
+@service_bp.record_once
+def check_image_support(state):
+    if not HAS_PILLOW:
+        state.app.logger.warning("Pillow is not installed: uploads get no resized or WebP variants "
+                                 "and ?w= serves the original (see requirements-optional.txt)")
+
+
+versioned(Service)
+
+CATALOG_KEY = "service:catalog"
+CATALOG_VERSION_KEY = "service:catalog:version"
 
 def allowed_file(filename):
     return "." in filename and filename.rsplit(".", 1)[1].lower() in ALLOWED_EXTENSIONS
 
 
+@service_bp.errorhandler(RequestEntityTooLarge)
+def upload_too_large(err):
+    return jsonify({"status": "error", "message": f"Max {MAX_FILE_SIZE_MB}MB allowed"}), 413
+
+
+@service_bp.errorhandler(InvalidUpload)
+def invalid_upload(err):
+    return jsonify({"status": "error", "message": err.description}), 400
+
+
 
 
 @service_bp.route("/uploads/services/<filename>", methods=["GET"])
 def uploaded_file(filename):
-    return send_from_directory(UPLOAD_FOLDER, filename)
+    width = request.args.get("w", type=int)
+    served = filename
+    if width:
+        accept_webp = any(mime == "image/webp" for mime, _ in request.accept_mimetypes)
+        served = pick_variant(UPLOAD_FOLDER, filename, width, accept_webp)
+
+    # Upload names (uuid or content hash) are never reused for other bytes.
+    # A ?w= request that fell back to the original may get a variant later,
+    # so only that case stays revalidatable.
+    response = send_asset(UPLOAD_FOLDER, served, immutable=not width or served != filename)
+    if width:
+        response.vary.add("Accept")
+    return response
 
 
 
 
 @service_bp.route("/service", methods=["POST"])
 @jwt_required()
+# Uniqueness check, INSERT, the table_version bump and the post-commit reload.
+@query_budget(4)
+@streamed_upload(UPLOAD_FOLDER, MAX_FILE_SIZE_MB * 1024 * 1024)
 def add_service():
     data = request.get_json() if request.is_json else request.form.to_dict()
 
@@ -44,15 +95,10 @@ def add_service():
     if image_file:
         if not allowed_file(image_file.filename):
             return jsonify({"status": "error", "message": "Invalid image format"}), 400
-        image_file.seek(0, os.SEEK_END)
-        size_mb = image_file.tell() / (1024 * 1024)
-        image_file.seek(0)
-        if size_mb > MAX_FILE_SIZE_MB:
-            return jsonify({"status": "error", "message": f"Max {MAX_FILE_SIZE_MB}MB allowed"}), 400
-
         ext = image_file.filename.rsplit(".", 1)[1].lower()
-        image_filename = f"{uuid.uuid4().hex}.{ext}"
-        image_file.save(os.path.join(UPLOAD_FOLDER, image_filename))
+        image_filename, created = store_upload(image_file, UPLOAD_FOLDER, ext)
+        if created:
+            schedule_variants(UPLOAD_FOLDER, image_filename)
 
     new_service = Service(
         service=validated_data["service"],
@@ -80,20 +126,41 @@ def add_service():
 
 
 
+def build_catalog():
+    rows = Service.query.with_entities(*SERVICE_FIELDS).order_by(Service.id.asc())
+    return jsonify(serialize_rows(rows, SERVICE_FIELDS)).get_data(as_text=True)
+
+
+def catalog_version():
+    seed = cache.get(CATALOG_VERSION_KEY)
+    if seed is None:
+        # The version names the cached body, so both come from the primary:
+        # a lagging replica would pair the new body with the old ETag, and a
+        # client holding that ETag would get 304s for the stale catalog.
+        pin_primary(db.session)
+        _, seed = collection_version(Service)
+        cache.set(CATALOG_VERSION_KEY, seed, current_app.config["CATALOG_VERSION_TTL"])
+    g.catalog_seed = seed
+    return None, seed
+
+
+def forget_catalog_version():
+    cache.delete(CATALOG_VERSION_KEY)
+
+
+on_commit(Service, forget_catalog_version)
+
+
 @service_bp.route("/service", methods=["GET"])
 @jwt_required()
+@query_budget(2)
+@conditional(catalog_version)
 def get_service():
-    service = Service.query.order_by(Service.id.asc()).all()
-    result =  [
-           {
-            "id" : s.id,
-            "image" : s.image,
-            "service" : s.service,
-            "price" :s.price,
-            "created_at" : s.created_at,
-            "updated_at" : s.updated_at
-    } for s in service]
-    return jsonify(result),200
+    # A cached version and body answer without touching the database. A
+    # Service commit drops the version, so the next request reads the new
+    # one from the primary and moves on to a fresh body.
+    body = cache.get_or_set(f"{CATALOG_KEY}:{g.catalog_seed}", build_catalog)
+    return current_app.response_class(body, mimetype="application/json"),200
 
 
 
@@ -101,20 +168,15 @@ def get_service():
 
 @service_bp.route("/service/<int:id>", methods=["GET"])
 @jwt_required()
+@query_budget(2)
+@conditional(lambda id: row_version(Service, id))
 def getsingle_service(id):
-    service = Service.query.get(id)
+    service = Service.query.with_entities(*SERVICE_FIELDS).filter(Service.id == id).first()
 
     if not service:
         return jsonify({"error" : f"Service {id} not found"})
     
-    return jsonify({ 
-            "id" : service.id,
-            "image" : service.image,
-            "service" : service.service,
-            "price" :service.price,
-            "created_at" : service.created_at,
-            "updated_at" : service.updated_at
-            }),200
+    return jsonify(serialize(service, SERVICE_FIELDS)),200
 
 
 
@@ -122,6 +184,8 @@ def getsingle_service(id):
 
 @service_bp.route("/service/<int:id>", methods=["PUT"])
 @jwt_required()
+@query_budget(5)
+@streamed_upload(UPLOAD_FOLDER, MAX_FILE_SIZE_MB * 1024 * 1024)
 def update_service(id):
     service = Service.query.get(id)
     if not service:
@@ -129,7 +193,7 @@ def update_service(id):
 
     data = request.form.to_dict()
     image_file = request.files.get("image")
-    service_schema = ServiceSchema(current_id=id)
+    service_schema = ServiceSchema(current_id=id, current_name=service.service)
 
     try:
         validated_data = service_schema.load(data)
@@ -139,15 +203,19 @@ def update_service(id):
     service.service = validated_data.get("service", service.service)
     service.price = validated_data.get("price", service.price)
 
+    old_image = service.image
     if image_file:
         if not allowed_file(image_file.filename):
             return jsonify({"status": "error", "message": "Invalid image format"}), 400
         ext = image_file.filename.rsplit(".", 1)[1].lower()
-        image_filename = f"{uuid.uuid4().hex}.{ext}"
-        image_file.save(os.path.join(UPLOAD_FOLDER, image_filename))
+        image_filename, created = store_upload(image_file, UPLOAD_FOLDER, ext)
+        if created:
+            schedule_variants(UPLOAD_FOLDER, image_filename)
         service.image = image_filename
 
     db.session.commit()
+    if old_image != service.image:
+        release_image(UPLOAD_FOLDER, old_image)
 
     return jsonify({
         "status": "success",
@@ -165,6 +233,7 @@ def update_service(id):
 
 @service_bp.route("/service/<int:id>", methods=["DELETE"])
 @jwt_required()
+@query_budget(4)
 def del_service(id):
     service = Service.query.get(id)
 
@@ -173,17 +242,47 @@ def del_service(id):
     
     db.session.delete(service)
     db.session.commit()
+    release_image(UPLOAD_FOLDER, service.image)
 
     return jsonify({
         "status" : "success",
         "message" : "Service deleted successfully",
-        "service" : {
-            "id" : service.id,
-            "service" :service.service,
-            "image" :service.image,
-            "price" :service.price,
-            "created_at" :service.created_at,
-            "updated_at" :service.updated_at
-        }
+        "service" : serialize(service, SERVICE_FIELDS)
         })
 
+
+
+
+
+def format_mb(size):
+    return f"{size / (1024 * 1024):.2f} MB"
+
+
+@service_bp.cli.command("gc")
+@click.option("--dry-run", is_flag=True, help="Report orphans without deleting them.")
+@click.option("--grace", default=GC_GRACE_SECONDS, show_default=True,
+              help="Skip unreferenced files younger than this many seconds.")
+def uploads_gc(dry_run, grace):
+    """Delete uploaded images no service references any more."""
+    removed, freed = collect_garbage(UPLOAD_FOLDER, grace=grace, dry_run=dry_run)
+    verb = "Would remove" if dry_run else "Removed"
+    click.echo(f"{verb} {removed} files, {format_mb(freed)} reclaimed")
+
+
+@service_bp.cli.command("sweep")
+@click.option("--interval", type=int, help="Seconds between sweeps [default: UPLOAD_GC_INTERVAL].")
+def uploads_sweep(interval):
+    """Run the upload garbage collector in the foreground until stopped."""
+    interval = interval or current_app.config["UPLOAD_GC_INTERVAL"]
+    if not interval:
+        raise click.UsageError("Pass --interval or set UPLOAD_GC_INTERVAL.")
+    click.echo(f"Sweeping {UPLOAD_FOLDER} every {interval}s")
+    sweep_forever(current_app._get_current_object(), UPLOAD_FOLDER, interval)
+
+
+@service_bp.cli.command("stats")
+@click.option("--grace", default=GC_GRACE_SECONDS, show_default=True)
+def uploads_stats(grace):
+    """Show disk usage of the upload folder by reference state."""
+    for label, files in zip(("referenced", "orphaned", "pending"), scan_uploads(UPLOAD_FOLDER, grace)):
+        click.echo(f"{label:<11} {len(files):>6} files  {format_mb(sum(size for _, size in files))}")
@@ -0,0 +1,321 @@
+import hashlib, os, re, tempfile, threading, time
+from functools import wraps
+from flask import Request, request
+from werkzeug.exceptions import BadRequest, RequestEntityTooLarge
+from extensions import db, metrics
+from models.service import Service
+from api.images import IMAGE_WIDTHS, variant_name
+
+HASHED_NAME = re.compile(r"^[0-9a-f]{64}\.[a-z0-9]+$")
+CHUNK_SIZE = 64 * 1024
+EXTENSION_ALIASES = {"jpeg": "jpg"}
+GC_GRACE_SECONDS = 3600
+GC_BATCH = 500
+FORM_OVERHEAD = 64 * 1024
+
+IMAGE_SIGNATURES = {
+    b"\x89PNG\r\n\x1a\n": "png",
+    b"\xff\xd8\xff": "jpg",
+    b"GIF87a": "gif",
+    b"GIF89a": "gif",
+}
+SIGNATURE_LENGTH = 12
+
+
+def sniff_image(head):
+    """Image type from the first SIGNATURE_LENGTH bytes, or None."""
+    for magic, kind in IMAGE_SIGNATURES.items():
+        if head.startswith(magic):
+            return kind
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "webp"
+    if head[4:8] == b"ftyp" and head[8:12] in (b"avif", b"avis"):
+        return "avif"
+    return None
+
+
+class InvalidUpload(BadRequest):
+    description = "Invalid image format"
+
+
+class UploadSink:
+    """Writable file for one multipart file part, checked as bytes arrive.
+
+    Werkzeug writes the part straight into a temp file in the upload folder
+    while this wrapper counts bytes, hashes them and checks the image magic
+    bytes. Oversized or non-image uploads are rejected mid-stream instead of
+    after the whole body has been buffered.
+    """
+
+    def __init__(self, folder, limit):
+        fd, self.path = tempfile.mkstemp(dir=folder, suffix=".part")
+        self._file = os.fdopen(fd, "w+b")
+        self.limit = limit
+        self.size = 0
+        self.kind = None
+        self._head = b""
+        self._sha = hashlib.sha256()
+        self.claimed = False
+
+    def write(self, data):
+        self.size += len(data)
+        if self.limit is not None and self.size > self.limit:
+            raise RequestEntityTooLarge()
+        if self.kind is None:
+            self._head += data[:SIGNATURE_LENGTH - len(self._head)]
+            self._check_signature()
+        self._sha.update(data)
+        return self._file.write(data)
+
+    def _check_signature(self):
+        if len(self._head) < SIGNATURE_LENGTH:
+            return
+        self.kind = sniff_image(self._head)
+        if self.kind is None:
+            raise InvalidUpload()
+
+    @property
+    def digest(self):
+        return self._sha.hexdigest()
+
+    def discard(self):
+        self._file.close()
+        if not self.claimed and os.path.exists(self.path):
+            os.remove(self.path)
+
+    def __getattr__(self, name):
+        return getattr(self._file, name)
+
+
+class UploadRequest(Request):
+    """Request whose file parts go to an UploadSink inside @streamed_upload views."""
+
+    upload_folder = None
+    upload_limit = None
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        if self.upload_folder is None or not filename:
+            return super()._get_file_stream(total_content_length, content_type, filename, content_length)
+        sink = UploadSink(self.upload_folder, self.upload_limit)
+        self.__dict__.setdefault("upload_sinks", []).append(sink)
+        return sink
+
+
+def streamed_upload(folder, max_bytes):
+    """Stream file parts of the request into ``folder``, at most ``max_bytes`` each.
+
+    MAX_CONTENT_LENGTH is tightened for the request, so a declared oversized
+    body is refused before a single byte is read. Temp files a view did not
+    store are removed when it returns.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            request.upload_folder = folder
+            request.upload_limit = max_bytes
+            request.max_content_length = max_bytes + FORM_OVERHEAD
+            try:
+                return view(*args, **kwargs)
+            finally:
+                for sink in request.__dict__.get("upload_sinks", []):
+                    sink.discard()
+        return wrapper
+    return decorator
+
+
+def is_content_addressed(filename):
+    return bool(HASHED_NAME.match(filename))
+
+
+def store_upload(image_file, folder, ext):
+    """Save an upload under the SHA-256 of its bytes.
+
+    Returns (filename, created). Identical content maps to the same name, so a
+    duplicate upload costs no extra disk and ``created`` is False.
+    """
+    if isinstance(image_file.stream, UploadSink):
+        filename, created = claim_sink(image_file.stream, folder)
+        count_upload(image_file.stream.size, created)
+        return filename, created
+
+    ext = EXTENSION_ALIASES.get(ext, ext)
+    digest = hashlib.sha256()
+    size = 0
+    fd, tmp_path = tempfile.mkstemp(dir=folder, suffix=".part")
+    try:
+        with os.fdopen(fd, "wb") as out:
+            for chunk in iter(lambda: image_file.stream.read(CHUNK_SIZE), b""):
+                digest.update(chunk)
+                out.write(chunk)
+                size += len(chunk)
+        os.chmod(tmp_path, 0o644)
+
+        filename = f"{digest.hexdigest()}.{ext}"
+        path = os.path.join(folder, filename)
+        if os.path.exists(path):
+            os.remove(tmp_path)
+            # Refresh mtime so the orphan collector's grace period covers the
+            # window before the new reference is committed.
+            os.utime(path)
+            count_upload(size, False)
+            return filename, False
+        os.replace(tmp_path, path)
+        count_upload(size, True)
+        return filename, True
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def count_upload(size, created):
+    metrics.inc("upload_bytes_total", size)
+    metrics.inc("uploads_total", result="stored" if created else "duplicate")
+
+
+def claim_sink(sink, folder):
+    """store_upload for a part that was already hashed while streaming."""
+    if sink.kind is None:
+        # Shorter than SIGNATURE_LENGTH, so the check never completed.
+        sink.kind = sniff_image(sink._head)
+    if sink.kind is None:
+        raise InvalidUpload()
+    sink.flush()
+    os.chmod(sink.path, 0o644)
+    filename = f"{sink.digest}.{sink.kind}"
+    path = os.path.join(folder, filename)
+    if os.path.exists(path):
+        os.utime(path)
+        return filename, False
+    os.replace(sink.path, path)
+    sink.claimed = True
+    return filename, True
+
+
+def image_refcount(filename):
+    return Service.query.filter_by(image=filename).count()
+
+
+def stored_names(filename):
+    """An upload plus every variant api.images may have written for it."""
+    names = [filename]
+    if "." in filename:
+        for width in IMAGE_WIDTHS.values():
+            names += [variant_name(filename, width), variant_name(filename, width, "webp")]
+    return names
+
+
+def is_settled(path, grace=GC_GRACE_SECONDS):
+    """True when ``path`` was not stored or deduplicated onto in the last ``grace`` seconds.
+
+    store_upload touches the file before the service that uses it commits,
+    so a recent mtime means a reference may still be on its way.
+    """
+    try:
+        return os.path.getmtime(path) < time.time() - grace
+    except FileNotFoundError:
+        return False
+
+
+def release_image(folder, filename, grace=GC_GRACE_SECONDS):
+    """Delete an upload and its variants once no service references it.
+
+    Call after the commit that dropped the reference. Uploads stored or
+    reused within ``grace`` seconds are left to collect_garbage, since a
+    concurrent upload of the same bytes may not have committed yet.
+    Returns bytes freed.
+    """
+    if not filename or image_refcount(filename):
+        return 0
+    if not is_settled(os.path.join(folder, filename), grace):
+        return 0
+    freed = 0
+    for name in stored_names(filename):
+        path = os.path.join(folder, name)
+        try:
+            size = os.path.getsize(path)
+            os.remove(path)
+        except FileNotFoundError:
+            continue
+        freed += size
+    return freed
+
+
+def referenced_names():
+    names = set()
+    for (image,) in db.session.query(Service.image).filter(Service.image.isnot(None)).distinct():
+        names.update(stored_names(image))
+    return names
+
+
+def scan_uploads(folder, grace=GC_GRACE_SECONDS):
+    """Split the upload folder into referenced, orphaned and pending files.
+
+    Each list holds (name, size) pairs. Unreferenced files younger than
+    ``grace`` seconds are pending: their service may not be committed yet.
+    """
+    cutoff = time.time() - grace
+    entries = [entry for entry in os.scandir(folder) if entry.is_file()]
+    referenced = referenced_names()
+
+    kept, orphans, pending = [], [], []
+    for entry in entries:
+        stat = entry.stat()
+        if entry.name in referenced:
+            kept.append((entry.name, stat.st_size))
+        elif stat.st_mtime < cutoff:
+            orphans.append((entry.name, stat.st_size))
+        else:
+            pending.append((entry.name, stat.st_size))
+    return kept, orphans, pending
+
+
+def collect_garbage(folder, grace=GC_GRACE_SECONDS, batch_size=GC_BATCH, dry_run=False):
+    """Delete unreferenced uploads in batches. Returns (files removed, bytes freed)."""
+    _, orphans, _ = scan_uploads(folder, grace)
+    removed = freed = 0
+    for start in range(0, len(orphans), batch_size):
+        # References are re-read per batch so a long sweep never deletes a
+        # file that a service picked up after the scan.
+        referenced = referenced_names()
+        for name, size in orphans[start:start + batch_size]:
+            if name in referenced:
+                continue
+            path = os.path.join(folder, name)
+            # Deduplicated onto by an upload since the scan.
+            if not is_settled(path, grace):
+                continue
+            if not dry_run:
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    continue
+            removed += 1
+            freed += size
+    return removed, freed
+
+
+def sweep_forever(app, folder, interval):
+    """Run collect_garbage every ``interval`` seconds, never returning."""
+    while True:
+        time.sleep(interval)
+        with app.app_context():
+            try:
+                removed, freed = collect_garbage(folder)
+            except Exception:
+                app.logger.exception("Upload sweep failed")
+                continue
+        if removed:
+            app.logger.info("Upload sweep removed %d files, %d bytes", removed, freed)
+
+
+def start_sweeper(app, folder, interval):
+    """Run sweep_forever on a daemon thread.
+
+    Threads do not survive fork, so start it in the process that should
+    sweep, e.g. gunicorn's master from when_ready, never while building the
+    app.
+    """
+    thread = threading.Thread(target=sweep_forever, args=(app, folder, interval), name="uploads-gc", daemon=True)
+    thread.start()
+    return thread
@@ -1,22 +1,52 @@
+from dotenv import load_dotenv
 from flask import Flask, render_template
-from config import Config
-from extensions import db, jwt, migrate
+from werkzeug.middleware.proxy_fix import ProxyFix
+from sqlalchemy.engine import make_url
+from extensions import db, jwt, cache, assets, hasher, compress, profiler, metrics
+from extensions.json_provider import JSONProvider
+from extensions.migrate import MigrateCommands
 from auth.auth import auth_bp
 from api.data import data_bp
 from api.service import service_bp
+from api.storage import UploadRequest
+from diagnostics.plans import plans_cli
+from diagnostics.internal import internal_bp, metrics_bp
 
 
-def create_app():
+def create_app(config=None):
+    if config is None:
+        # Config reads the environment while its module is imported, so .env
+        # has to be loaded first.
+        load_dotenv()
+        from config import get_config
+        config = get_config()
+
     app = Flask(__name__)
-    app.config.from_object(Config)
+    app.request_class = UploadRequest
+    app.json = JSONProvider(app)
+    app.config.from_object(config)
+    if app.config.get("PROXY_FIX_HOPS"):
+        hops = app.config["PROXY_FIX_HOPS"]
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=hops, x_proto=hops)
+    app.logger.info("Database: %s", make_url(app.config["SQLALCHEMY_DATABASE_URI"]).render_as_string(hide_password=True))
 
     db.init_app(app)
+    # First, so its after_request runs last and the total covers compression.
+    profiler.init_app(app)
+    metrics.init_app(app)
     jwt.init_app(app)
-    migrate.init_app(app, db)
+    app.cli.add_command(MigrateCommands(db))
+    cache.init_app(app)
+    compress.init_app(app)
+    assets.init_app(app)
+    hasher.init_app(app)
 
     app.register_blueprint(auth_bp, url_prefix="/auth")
     app.register_blueprint(data_bp, url_prefix="/api")
     app.register_blueprint(service_bp)
+    app.register_blueprint(internal_bp, url_prefix="/internal")
+    app.register_blueprint(metrics_bp)
+    app.cli.add_command(plans_cli)
 
     @app.route("/")
     def home():
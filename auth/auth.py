@@ -1,19 +1,26 @@
 from flask import Blueprint, request, jsonify
-from werkzeug.security import generate_password_hash, check_password_hash
 from flask_jwt_extended import create_access_token
-from extensions import db
+from extensions import db, hasher
+from extensions.hashing import HashingBusy
+from extensions.query_budget import query_budget
+from sqlalchemy.exc import IntegrityError
 from models.user import User
 from schema.auth import UserSchema, LoginSchema,Reset
+from api.serializers import USER_FIELDS, serialize, serialize_rows
 from datetime import timedelta
 
 auth_bp = Blueprint("auth", __name__)
 
 user_schema = UserSchema()
-login_schema = LoginSchema()
-reset = Reset()
+
+
+@auth_bp.errorhandler(HashingBusy)
+def hashing_busy(err):
+    return jsonify({"error": err.description}), 503, {"Retry-After": str(hasher.retry_after)}
 
 
 @auth_bp.route("/register", methods=["POST"])
+@query_budget(2)
 def register():
     data = request.get_json() if request.is_json else request.form.to_dict()
 
@@ -26,41 +33,36 @@ def register():
     password = data.get("password")
     phone = data.get("phone")
 
-    hashed_password = generate_password_hash(password)
+    hashed_password = hasher.hash(password)
     new_user = User(name=name, email=email, password=hashed_password, phone=phone)
 
     db.session.add(new_user)
-    db.session.commit()
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # Lost a race with a concurrent registration for the same email.
+        db.session.rollback()
+        return jsonify({"errors": {"email": ["This email is already registered."]}}), 400
 
     return jsonify({"message": "User registered successfully"}), 201
 
 
 
 @auth_bp.route("/register", methods=["GET"])
+@query_budget(1)
 def get_users():
-    users = User.query.all()
-    result = [{
-        "id": u.id,
-        "name": u.name,
-        "email": u.email,
-        "phone": u.phone
-        } for u in users]
-    return jsonify(result), 200
+    users = User.query.with_entities(*USER_FIELDS)
+    return jsonify(serialize_rows(users, USER_FIELDS)), 200
 
 
 
 @auth_bp.route("/register/<int:id>", methods=["GET"])
 def get_user(id):
-    user = User.query.get(id)
+    user = User.query.with_entities(*USER_FIELDS).filter(User.id == id).first()
     if not user:
         return jsonify({"error": f"User {id} not found"}), 400
     
-    return jsonify({
-                     "id" : user.id,
-                     "name" : user.name,
-                     "email" : user.email,
-                     "phone" : user.phone
-                   }), 200
+    return jsonify(serialize(user, USER_FIELDS)), 200
 
 
 
@@ -77,25 +79,27 @@ def delete_user(id):
 
 
 @auth_bp.route("/login", methods=["POST"])
+# The user lookup, plus an UPDATE when the stored hash gets upgraded.
+@query_budget(2)
 def login():
     data = request.get_json() if request.is_json else request.form.to_dict()
+    login_schema = LoginSchema()
     errors = login_schema.validate(data)
     if errors:
         return jsonify({"errors": errors}), 400
 
-    email = data.get("email")
     password = data.get("password")
 
-    user = User.query.filter_by(email=email).first()
-    if not user or not check_password_hash(user.password, password):
+    user = login_schema.user
+    if not user or not hasher.verify(user.password, password):
         return jsonify({"error": "Invalid email or password"}), 401
 
     token = create_access_token(
         identity=str(user.id),
         expires_delta=timedelta(days=30)
     )
-
-    return jsonify({
+    # Built before the rehash commit below expires the user's attributes.
+    body = {
         "message": "Login successful",
         "token": token,
         "user": {
@@ -103,7 +107,13 @@ def login():
             "name": user.name,
             "email": user.email
         }
-    }), 200
+    }
+
+    if hasher.needs_rehash(user.password):
+        user.password = hasher.hash(password)
+        db.session.commit()
+
+    return jsonify(body), 200
 
 
 
@@ -113,18 +123,18 @@ def login():
 def reset_password():
     data = request.get_json() if request.is_json else request.form.to_dict()
 
+    reset = Reset()
     error = reset.validate(data)
     if error:
         return jsonify({"error" : error})
     
-    email = data.get("email")
     new_password = data.get("new_password") 
 
-    user = User.query.filter_by(email=email).first()
+    user = reset.user
     if not user:
         return jsonify({"error": "Email does not exist"}), 404
 
-    user.password = generate_password_hash(new_password)
+    user.password = hasher.hash(new_password)
     db.session.commit()
 
     return jsonify({"message": "Password reset successfully"}), 200
@@ -0,0 +1,11 @@
+"""Endpoint benchmarks against a seeded scratch database.
+
+    python -m benchmarks --database sqlite:////tmp/bench.db --rows 10000
+    python -m benchmarks --server wsgi --concurrency 8 --baseline baseline.json
+
+Each scenario runs in a fresh process, so its peak RSS is its own. With
+--server wsgi that process starts gunicorn with gunicorn.conf.py when
+gunicorn is installed, and Werkzeug's threaded server otherwise.
+
+See ``python -m benchmarks --help`` for every option.
+"""
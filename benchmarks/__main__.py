@@ -0,0 +1,209 @@
+import importlib.util, json, logging, os, platform, subprocess, sys, tempfile, time
+from concurrent.futures import ThreadPoolExecutor
+import click
+
+VOLUMES = {"10k": 10_000, "1m": 1_000_000, "10m": 10_000_000}
+SERVERS = ("testclient", "wsgi")
+GUNICORN_CONFIG = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "gunicorn.conf.py")
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def prepare(db, rows, users, services):
+    """Create missing tables and seed an empty database; returns the Data row count.
+
+    Tables come from the models, so a fresh SQLite file has no FTS index and
+    name searches use LIKE. Point --database at a migrated database to bench
+    against the production indexes.
+    """
+    from sqlalchemy import func, select
+    from diagnostics.seed import seed
+    from models.data import Data
+
+    if db.engine.dialect.name == "postgresql":
+        with db.engine.begin() as conn:
+            conn.exec_driver_sql("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    db.create_all()
+
+    existing = db.session.scalar(select(func.count()).select_from(Data))
+    if existing:
+        if existing != rows:
+            click.echo(f"Database already holds {existing} data rows; using them as is", err=True)
+        return existing
+    click.echo(f"Seeding {rows} data rows, {users} users, {services} services...")
+    seed(data_rows=rows, users=users, services=services)
+    return rows
+
+
+def wsgi_server():
+    """gunicorn with the repo's config when both exist, Werkzeug's server otherwise."""
+    if os.path.exists(GUNICORN_CONFIG) and importlib.util.find_spec("gunicorn"):
+        return "gunicorn"
+    return "werkzeug"
+
+
+def make_driver(server_name, app):
+    from benchmarks.drivers import GunicornDriver, TestClientDriver, WSGIServerDriver
+
+    if server_name == "testclient":
+        return TestClientDriver(app)
+    if wsgi_server() == "gunicorn":
+        return GunicornDriver(GUNICORN_CONFIG)
+    return WSGIServerDriver(app)
+
+
+def run_isolated(database, rows, server_name, scenario, requests, warmup, concurrency):
+    """Run one scenario in a fresh ``python -m benchmarks`` process and return its summary.
+
+    ru_maxrss is a high-water mark, so peak RSS only belongs to one endpoint
+    when that endpoint had the process to itself.
+    """
+    fd, path = tempfile.mkstemp(suffix=".json", prefix="bench-")
+    os.close(fd)
+    try:
+        subprocess.run([sys.executable, "-m", "benchmarks", "--database", database, "--rows", str(rows),
+                        "--server", server_name, "--only", scenario, "--requests", str(requests),
+                        "--warmup", str(warmup), "--concurrency", str(concurrency),
+                        "--output", path, "--scenario-process"], check=True)
+        with open(path) as f:
+            return json.load(f)
+    finally:
+        os.remove(path)
+
+
+def run_scenario(driver, build, requests, warmup, concurrency):
+    for i in range(warmup):
+        driver.request(build(i))
+
+    def timed(i):
+        spec = build(warmup + i)
+        start = time.perf_counter()
+        try:
+            status = driver.request(spec)
+        except Exception:
+            status = None
+        return time.perf_counter() - start, status
+
+    latencies, errors = [], 0
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for elapsed, status in pool.map(timed, range(requests)):
+            latencies.append(elapsed)
+            errors += status is None or status >= 400
+    return latencies, errors, time.perf_counter() - start
+
+
+@click.command()
+@click.option("--database", envvar="DATABASE_URL", default="sqlite:////tmp/velox-bench.db", show_default=True,
+              help="Scratch database URI; seeded when empty.")
+@click.option("--volume", type=click.Choice(list(VOLUMES)), default="10k", show_default=True)
+@click.option("--rows", type=int, help="Data rows to seed, overrides --volume.")
+@click.option("--users", default=1000, show_default=True)
+@click.option("--services", default=50, show_default=True)
+@click.option("--server", type=click.Choice(SERVERS + ("both",)), default="testclient", show_default=True)
+@click.option("--requests", "-n", default=200, show_default=True, help="Measured requests per scenario.")
+@click.option("--warmup", default=10, show_default=True)
+@click.option("--concurrency", "-c", default=1, show_default=True)
+@click.option("--only", multiple=True, help="Run only these scenarios (repeatable).")
+@click.option("--output", "-o", default="benchmark.json", show_default=True)
+@click.option("--baseline", type=click.Path(exists=True, dir_okay=False), help="Earlier output to compare against.")
+@click.option("--max-regression", type=float, help="Exit 1 when any p50/p95/p99/throughput regresses by more percent.")
+@click.option("--scenario-process", is_flag=True, hidden=True,
+              help="Internal: run the single --only scenario here against an already seeded database.")
+def main(database, volume, rows, users, services, server, requests, warmup, concurrency, only,
+         output, baseline, max_regression, scenario_process):
+    """Seed a scratch database and benchmark every hot endpoint.
+
+    Every scenario runs in its own process (and, for --server wsgi, its own
+    gunicorn when installed), so peak RSS is per endpoint.
+    """
+    # Config reads the URI when it is imported.
+    os.environ["DATABASE_URL"] = database
+    from flask_jwt_extended import create_access_token
+    from sqlalchemy import select
+    from app import create_app
+    from diagnostics.seed import SEED_PASSWORD
+    from extensions import db
+    from models.user import User
+    from benchmarks.scenarios import build_scenarios
+    from benchmarks.stats import compare, peak_rss_mb, summarize
+
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    rows = rows or VOLUMES[volume]
+    app = create_app()
+    with app.app_context():
+        if not scenario_process:
+            rows = prepare(db, rows, users, services)
+        user = db.session.scalars(select(User).order_by(User.id.asc()).limit(1)).first()
+        ctx = {"token": create_access_token(identity=str(user.id)), "email": user.email,
+               "password": SEED_PASSWORD, "rows": rows, "run": int(time.time())}
+    scenarios = build_scenarios(ctx)
+    if only:
+        unknown = set(only) - set(scenarios)
+        if unknown:
+            raise click.BadParameter(f"unknown scenarios: {', '.join(sorted(unknown))}", param_hint="--only")
+        scenarios = {name: build for name, build in scenarios.items() if name in only}
+
+    if scenario_process:
+        (name, build), = scenarios.items()
+        driver = make_driver(server, app)
+        try:
+            measured = run_scenario(driver, build, requests, warmup, concurrency)
+        finally:
+            driver.close()
+        summary = summarize(*measured, peak_rss_mb(driver.rusage))
+        click.echo(f"{server:<10} {name:<16} p50 {summary['p50_ms']:>9} ms  "
+                   f"p95 {summary['p95_ms']:>9} ms  p99 {summary['p99_ms']:>9} ms  "
+                   f"{summary['throughput_rps']:>8} req/s  {summary['peak_rss_mb']:>7} MB  "
+                   f"errors {summary['errors']}")
+        with open(output, "w") as f:
+            json.dump(summary, f)
+        return
+
+    servers = SERVERS if server == "both" else (server,)
+    if "wsgi" in servers and wsgi_server() == "werkzeug":
+        click.echo("gunicorn is not installed; the wsgi runs use Werkzeug's threaded server", err=True)
+    results = {}
+    for server_name in servers:
+        results[server_name] = {}
+        for name in scenarios:
+            results[server_name][name] = run_isolated(database, rows, server_name, name,
+                                                      requests, warmup, concurrency)
+
+    report = {
+        "meta": {
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "database": database.split(":", 1)[0],
+            "wsgi_server": wsgi_server() if "wsgi" in servers else None,
+            "rows": rows, "users": users, "services": services,
+            "requests": requests, "warmup": warmup, "concurrency": concurrency,
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        },
+        "results": results,
+    }
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    click.echo(f"Wrote {output}")
+
+    if baseline:
+        with open(baseline) as f:
+            before = json.load(f)["results"]
+        worst = None
+        for server_name, current in results.items():
+            for name, metric, old, new, change in compare(current, before.get(server_name, {})):
+                click.echo(f"{server_name:<10} {name:<16} {metric:<15} {old:>10} -> {new:>10}  {change:+.1f}%")
+                worst = change if worst is None else max(worst, change)
+        if max_regression is not None and worst is not None and worst > max_regression:
+            click.echo(f"Regression of {worst:.1f}% exceeds {max_regression}%", err=True)
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+import http.client, os, resource, socket, subprocess, sys, threading, time
+from werkzeug.serving import make_server
+from werkzeug.test import EnvironBuilder
+
+
+class TestClientDriver:
+    """Calls the WSGI app in-process through Flask's test client."""
+
+    name = "testclient"
+    # The app runs in this process.
+    rusage = resource.RUSAGE_SELF
+
+    def __init__(self, app):
+        self.app = app
+        self._local = threading.local()
+
+    def request(self, spec):
+        client = getattr(self._local, "client", None)
+        if client is None:
+            client = self._local.client = self.app.test_client()
+        response = client.open(**spec)
+        response.get_data()
+        response.close()
+        return response.status_code
+
+    def close(self):
+        pass
+
+
+class HTTPDriver:
+    """Talks real HTTP to a server on host:port, one keep-alive connection per load thread."""
+
+    def __init__(self, host, port):
+        self.host, self.port = host, port
+        self._local = threading.local()
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = http.client.HTTPConnection(self.host, self.port, timeout=60)
+        return conn
+
+    def request(self, spec):
+        builder = EnvironBuilder(**spec)
+        try:
+            environ = builder.get_environ()
+        finally:
+            builder.close()
+        body = environ["wsgi.input"].read()
+        headers = {key: value for key, value in builder.headers.items()}
+        if environ.get("CONTENT_TYPE"):
+            headers["Content-Type"] = environ["CONTENT_TYPE"]
+        headers["Content-Length"] = str(len(body))
+
+        path = environ["PATH_INFO"] + (f"?{environ['QUERY_STRING']}" if environ["QUERY_STRING"] else "")
+        conn = self._connection()
+        try:
+            conn.request(environ["REQUEST_METHOD"], path, body=body, headers=headers)
+            response = conn.getresponse()
+            response.read()
+        except (http.client.HTTPException, OSError):
+            conn.close()
+            self._local.conn = None
+            raise
+        return response.status
+
+
+class WSGIServerDriver(HTTPDriver):
+    """Runs the app on a threaded Werkzeug server in this process."""
+
+    name = "wsgi"
+    server = "werkzeug"
+    rusage = resource.RUSAGE_SELF
+
+    def __init__(self, app, host="127.0.0.1"):
+        self.httpd = make_server(host, 0, app, threaded=True)
+        self.httpd.RequestHandlerClass.protocol_version = "HTTP/1.1"
+        super().__init__(host, self.httpd.server_port)
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="bench-server", daemon=True)
+        self._thread.start()
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class GunicornDriver(HTTPDriver):
+    """Runs the app under gunicorn with the repo's gunicorn.conf.py.
+
+    The server is a child process, so its memory shows up in
+    RUSAGE_CHILDREN once close() has waited for it.
+    """
+
+    name = "wsgi"
+    server = "gunicorn"
+    rusage = resource.RUSAGE_CHILDREN
+
+    def __init__(self, config, host="127.0.0.1", startup_timeout=30):
+        with socket.socket() as probe:
+            probe.bind((host, 0))
+            port = probe.getsockname()[1]
+        super().__init__(host, port)
+        self.process = subprocess.Popen(
+            [sys.executable, "-m", "gunicorn", "-c", config, "--bind", f"{host}:{port}", "--log-level", "warning"],
+            cwd=os.path.dirname(os.path.abspath(config)),
+        )
+        deadline = time.monotonic() + startup_timeout
+        while True:
+            if self.process.poll() is not None:
+                raise RuntimeError(f"gunicorn exited with {self.process.returncode} during startup")
+            try:
+                socket.create_connection((host, port), timeout=1).close()
+                break
+            except OSError:
+                if time.monotonic() > deadline:
+                    self.close()
+                    raise RuntimeError(f"gunicorn did not listen on {host}:{port} within {startup_timeout}s")
+                time.sleep(0.1)
+
+    def close(self):
+        self.process.terminate()
+        try:
+            self.process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+            self.process.wait()
@@ -0,0 +1,51 @@
+import struct, zlib
+from itertools import count
+from api.data import encode_cursor
+
+SEARCH_TERMS = ["kara", "lumo", "neti", "savo", "rede", "ash"]
+PER_PAGE = 20
+
+
+def tiny_png():
+    """A valid 1x1 PNG, so upload sniffing and variant building both accept it."""
+    def chunk(kind, data):
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+    header = struct.pack(">IIBBBBB", 1, 1, 8, 2, 0, 0, 0)
+    return (b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", header)
+            + chunk(b"IDAT", zlib.compress(b"\x00\xff\x00\x00")) + chunk(b"IEND", b""))
+
+
+def build_scenarios(ctx):
+    """name -> function(i) returning EnvironBuilder keyword arguments.
+
+    ``ctx`` holds the bearer token, a seeded user's email and the row
+    counts; the i-th request of a scenario is deterministic.
+    """
+    auth = {"Authorization": f"Bearer {ctx['token']}"}
+    rows = max(ctx["rows"], 1)
+    pages = max(rows // PER_PAGE, 1)
+    names = count()
+    png = tiny_png()
+
+    def add_service(i):
+        # Every request uploads the same bytes, so the upload folder gains a
+        # single content-addressed file (plus variants) per benchmark database.
+        from io import BytesIO
+        return {"method": "POST", "path": "/service", "headers": auth,
+                "data": {"service": f"Bench service {ctx['run']}-{next(names)}", "price": "250",
+                         "image": (BytesIO(png), "bench.png")}}
+
+    return {
+        "get_data": lambda i: {"path": f"/api/data?page={i % pages + 1}&per_page={PER_PAGE}", "headers": auth},
+        "get_data_search": lambda i: {"path": f"/api/data?search={SEARCH_TERMS[i % len(SEARCH_TERMS)]}&per_page={PER_PAGE}",
+                                      "headers": auth},
+        "get_data_cursor": lambda i: {"path": f"/api/data?per_page={PER_PAGE}&after={encode_cursor(i * PER_PAGE % rows)}",
+                                      "headers": auth},
+        "get": lambda i: {"path": f"/api/data/{i % rows + 1}", "headers": auth},
+        "export_data": lambda i: {"path": f"/api/data/export?format=ndjson&search={SEARCH_TERMS[i % len(SEARCH_TERMS)]}",
+                                  "headers": auth},
+        "get_service": lambda i: {"path": "/service", "headers": auth},
+        "login": lambda i: {"method": "POST", "path": "/auth/login",
+                            "json": {"email": ctx["email"], "password": ctx["password"]}},
+        "add_service": add_service,
+    }
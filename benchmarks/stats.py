@@ -0,0 +1,58 @@
+import resource, sys
+
+METRICS = ("p50_ms", "p95_ms", "p99_ms", "throughput_rps")
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = max(1, -(-len(sorted_values) * pct // 100))
+    return sorted_values[int(rank) - 1]
+
+
+def peak_rss_mb(who=resource.RUSAGE_SELF):
+    """High-water RSS of this process, or of its largest waited-for child.
+
+    ru_maxrss never goes down, so it only describes one scenario when that
+    scenario had the process (and any server it started) to itself.
+    """
+    peak = resource.getrusage(who).ru_maxrss
+    # Linux reports KiB, macOS bytes.
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def summarize(latencies, errors, wall_seconds, peak_rss):
+    ordered = sorted(latencies)
+    ms = lambda value: round(value * 1000, 3) if value is not None else None
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "mean_ms": ms(sum(ordered) / len(ordered)) if ordered else None,
+        "p50_ms": ms(percentile(ordered, 50)),
+        "p95_ms": ms(percentile(ordered, 95)),
+        "p99_ms": ms(percentile(ordered, 99)),
+        "throughput_rps": round(len(latencies) / wall_seconds, 1) if wall_seconds else None,
+        "peak_rss_mb": peak_rss,
+    }
+
+
+def compare(results, baseline):
+    """(scenario, metric, before, after, change %) for scenarios in both runs.
+
+    Positive change is always a regression: slower latency or lower throughput.
+    """
+    rows = []
+    for name, current in results.items():
+        before = baseline.get(name)
+        if not before:
+            continue
+        for metric in METRICS:
+            old, new = before.get(metric), current.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old * 100
+            if metric == "throughput_rps":
+                change = -change
+            rows.append((name, metric, old, new, round(change, 1)))
+    return rows
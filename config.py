@@ -1,7 +1,32 @@
 import os
-from dotenv import load_dotenv
+from extensions.pool import TimedQueuePool
+
+
+def engine_options(uri, pool_size, max_overflow, pool_timeout, pool_recycle, statement_timeout_ms):
+    """SQLALCHEMY_ENGINE_OPTIONS for ``uri``.
+
+    The arguments are a profile's defaults; DB_POOL_SIZE, DB_MAX_OVERFLOW,
+    DB_POOL_TIMEOUT, DB_POOL_RECYCLE, DB_POOL_PRE_PING and
+    DB_STATEMENT_TIMEOUT_MS override them. Every worker process gets its own
+    pool, so workers * (pool_size + max_overflow) has to stay below the
+    server's max_connections.
+    """
+    if not uri.startswith("postgresql"):
+        # SQLite picks its own pool and has no statement timeout.
+        return {}
+    options = {
+        "poolclass": TimedQueuePool,
+        "pool_size": int(os.getenv("DB_POOL_SIZE", pool_size)),
+        "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", max_overflow)),
+        "pool_timeout": float(os.getenv("DB_POOL_TIMEOUT", pool_timeout)),
+        "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", pool_recycle)),
+        "pool_pre_ping": os.getenv("DB_POOL_PRE_PING", "1").lower() not in ("0", "false", "no"),
+    }
+    statement_timeout = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", statement_timeout_ms))
+    if statement_timeout:
+        options["connect_args"] = {"options": f"-c statement_timeout={statement_timeout}"}
+    return options
 
-load_dotenv()
 
 class Config:
     SECRET_KEY = os.getenv("SECRET_KEY", "default_secret")
@@ -13,10 +38,116 @@ class Config:
     DB_PORT = os.getenv("DB_PORT", "5432")
     DB_NAME = os.getenv("DB_NAME", "test")
 
-    SQLALCHEMY_DATABASE_URI = (
+    SQLALCHEMY_DATABASE_URI = os.getenv("DATABASE_URL") or (
         f"postgresql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
     )
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options(
+        SQLALCHEMY_DATABASE_URI, pool_size=5, max_overflow=10,
+        pool_timeout=30, pool_recycle=1800, statement_timeout_ms=0,
+    )
+
+    # Comma-separated read replica URIs. GET requests read from one of them;
+    # they share SQLALCHEMY_ENGINE_OPTIONS with the primary.
+    DB_REPLICA_URLS = [url for url in os.getenv("DB_REPLICA_URLS", "").split(",") if url]
+    SQLALCHEMY_BINDS = {f"replica{i}": url for i, url in enumerate(DB_REPLICA_URLS)}
 
     SQLALCHEMY_TRACK_MODIFICATIONS = False
-    
-    print(" Connected to DB:", SQLALCHEMY_DATABASE_URI)
+
+    CACHE_BACKEND = os.getenv("CACHE_BACKEND", "memory")
+    CACHE_URL = os.getenv("CACHE_URL", "redis://localhost:6379/0")
+    CACHE_TTL = int(os.getenv("CACHE_TTL", 300))
+    CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", 1024))
+    # A Service commit deletes the cached catalog version. With the redis
+    # backend every worker sees that; with "memory" other workers keep
+    # theirs for up to CATALOG_VERSION_TTL seconds.
+    CATALOG_VERSION_TTL = int(os.getenv("CATALOG_VERSION_TTL", 5))
+
+    # Seconds between upload sweeps, run by gunicorn's master (see
+    # gunicorn.conf.py) or by "flask uploads sweep"; 0 turns them off.
+    UPLOAD_GC_INTERVAL = int(os.getenv("UPLOAD_GC_INTERVAL", 0))
+
+    # "x-sendfile" (Apache/lighttpd) or "x-accel" (nginx) hands file bodies
+    # to the web server; X_ACCEL_PREFIX is the nginx internal location. It
+    # must not overlap an app route: /internal is the internal blueprint.
+    SENDFILE_MODE = os.getenv("SENDFILE_MODE", "")
+    USE_X_SENDFILE = SENDFILE_MODE in ("x-sendfile", "x-accel")
+    X_ACCEL_PREFIX = os.getenv("X_ACCEL_PREFIX", "/protected-uploads")
+
+    # Werkzeug method string, e.g. "scrypt" or "pbkdf2:sha256:1000000".
+    # Changing it rehashes each password on the user's next login.
+    PASSWORD_HASH_METHOD = os.getenv("PASSWORD_HASH_METHOD", "scrypt")
+    HASH_EXECUTOR = os.getenv("HASH_EXECUTOR", "process")
+    HASH_WORKERS = int(os.getenv("HASH_WORKERS", 0))
+    HASH_QUEUE_SIZE = int(os.getenv("HASH_QUEUE_SIZE", 0))
+    HASH_QUEUE_TIMEOUT = float(os.getenv("HASH_QUEUE_TIMEOUT", 0.5))
+    HASH_RETRY_AFTER = int(os.getenv("HASH_RETRY_AFTER", 1))
+
+    # Responses are compressed with the first of COMPRESS_ALGORITHMS the
+    # client accepts and that is installed (br needs brotli, zstd zstandard).
+    COMPRESS_ALGORITHMS = os.getenv("COMPRESS_ALGORITHMS", "br,zstd,gzip").split(",")
+    COMPRESS_MIN_SIZE = int(os.getenv("COMPRESS_MIN_SIZE", 500))
+
+    # Server-Timing on every response; PROFILE_SAMPLE_RATE of requests also
+    # run under cProfile and are kept in PROFILE_DIR (default
+    # instance/profiles) when slower than PROFILE_SLOW_MS.
+    PROFILING = os.getenv("PROFILING", "1").lower() not in ("0", "false", "no")
+    PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", 0))
+    PROFILE_SLOW_MS = float(os.getenv("PROFILE_SLOW_MS", 500))
+    PROFILE_DIR = os.getenv("PROFILE_DIR")
+
+    # Shared directory for multi-process /metrics (one file per worker).
+    # Leave unset for a single process. gunicorn.conf.py empties it on start.
+    METRICS_DIR = os.getenv("METRICS_DIR")
+    METRICS_FLUSH_INTERVAL = float(os.getenv("METRICS_FLUSH_INTERVAL", 5))
+
+    # What @query_budget does when a view runs too many statements:
+    # "warn" logs them, "raise" fails the request, "off" skips counting.
+    QUERY_BUDGET_MODE = os.getenv("QUERY_BUDGET_MODE", "warn")
+
+    # /internal/* and /metrics need "Authorization: Bearer <INTERNAL_TOKEN>"
+    # and answer 404 while it is unset. INTERNAL_ALLOWED_IPS narrows them
+    # further; behind a proxy every client is the proxy's address unless
+    # PROXY_FIX_HOPS names how many proxies set X-Forwarded-For/-Proto.
+    INTERNAL_TOKEN = os.getenv("INTERNAL_TOKEN")
+    INTERNAL_ALLOWED_IPS = [ip for ip in os.getenv("INTERNAL_ALLOWED_IPS", "").split(",") if ip]
+    PROXY_FIX_HOPS = int(os.getenv("PROXY_FIX_HOPS", 0))
+
+
+class DevelopmentConfig(Config):
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options(
+        Config.SQLALCHEMY_DATABASE_URI, pool_size=2, max_overflow=3,
+        pool_timeout=10, pool_recycle=1800, statement_timeout_ms=0,
+    )
+
+
+class TestingConfig(Config):
+    TESTING = True
+    QUERY_BUDGET_MODE = os.getenv("QUERY_BUDGET_MODE", "raise")
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options(
+        Config.SQLALCHEMY_DATABASE_URI, pool_size=1, max_overflow=2,
+        pool_timeout=5, pool_recycle=1800, statement_timeout_ms=5000,
+    )
+
+
+class ProductionConfig(Config):
+    QUERY_BUDGET_MODE = os.getenv("QUERY_BUDGET_MODE", "off")
+    # Sized for a few gunicorn sync workers: fail fast instead of queueing
+    # behind a slow query, and drop connections before the server or a
+    # proxy does.
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options(
+        Config.SQLALCHEMY_DATABASE_URI, pool_size=5, max_overflow=5,
+        pool_timeout=5, pool_recycle=900, statement_timeout_ms=30000,
+    )
+
+
+config_by_name = {
+    "development": DevelopmentConfig,
+    "testing": TestingConfig,
+    "production": ProductionConfig,
+}
+
+
+def get_config():
+    """Profile named by APP_ENV (or FLASK_ENV); the base Config otherwise."""
+    name = os.getenv("APP_ENV") or os.getenv("FLASK_ENV", "")
+    return config_by_name.get(name.lower(), Config)
@@ -0,0 +1,64 @@
+"""Startup cost of the web app, measured with ``python -X importtime``.
+
+    python -m diagnostics.importtime --budget-ms 800
+
+Imports app and runs create_app() in a fresh interpreter. Fails when that
+takes longer than the budget, or when a module that must stay lazy
+(LAZY_MODULES) got imported.
+"""
+import os, subprocess, sys
+import click
+
+LAZY_MODULES = ("alembic", "flask_migrate", "PIL")
+CHILD = ("import time; start = time.perf_counter(); import app; app.create_app(); "
+         "print(time.perf_counter() - start)")
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def measure():
+    """(seconds to import and build the app, {module: (self us, cumulative us, depth)})."""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", CHILD],
+                            cwd=ROOT, capture_output=True, text=True)
+    if result.returncode:
+        errors = [line for line in result.stderr.splitlines() if not line.startswith("import time:")]
+        raise click.ClickException(errors[-1] if errors else f"exit status {result.returncode}")
+    modules = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        own, cumulative, name = line[len("import time:"):].split("|")
+        if not own.strip().isdigit():
+            continue  # the header line
+        depth = (len(name) - len(name.lstrip())) // 2
+        modules[name.strip()] = (int(own), int(cumulative), depth)
+    return float(result.stdout.strip().splitlines()[-1]), modules
+
+
+@click.command()
+@click.option("--budget-ms", type=float, default=float(os.getenv("STARTUP_BUDGET_MS", 1000)), show_default=True)
+@click.option("--runs", default=3, show_default=True, help="Best of this many runs is compared.")
+@click.option("--top", default=15, show_default=True, help="Heaviest top-level imports to list.")
+def main(budget_ms, runs, top):
+    """Fail when app startup regresses or a lazy dependency is imported eagerly."""
+    best, modules = min((measure() for _ in range(runs)), key=lambda run: run[0])
+
+    top_level = sorted(((cumulative, name) for name, (_, cumulative, depth) in modules.items() if depth == 0),
+                       reverse=True)
+    for cumulative, name in top_level[:top]:
+        click.echo(f"{cumulative / 1000:9.1f} ms  {name}")
+    click.echo(f"Startup: {best * 1000:.0f} ms (budget {budget_ms:.0f} ms)")
+
+    failed = False
+    eager = [name for name in modules if name.split(".", 1)[0] in LAZY_MODULES]
+    if eager:
+        click.echo(f"Imported at startup but should be lazy: {', '.join(sorted(eager)[:10])}", err=True)
+        failed = True
+    if best * 1000 > budget_ms:
+        click.echo("Startup is over budget", err=True)
+        failed = True
+    if failed:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
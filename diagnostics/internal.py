@@ -0,0 +1,106 @@
+import hmac, os, time
+from flask import Blueprint, abort, current_app, jsonify, request
+from sqlalchemy import text
+from extensions import db, cache, hasher, metrics
+from extensions.pool import pool_status
+
+internal_bp = Blueprint("internal", __name__)
+metrics_bp = Blueprint("metrics", __name__)
+
+
+@internal_bp.before_request
+@metrics_bp.before_request
+def internal_only():
+    # A shared token rather than the peer address alone: behind a reverse
+    # proxy every request arrives from the proxy's own (local) address.
+    token = current_app.config.get("INTERNAL_TOKEN")
+    auth = request.authorization
+    if not token or auth is None or auth.type != "bearer" or not hmac.compare_digest(auth.token or "", token):
+        abort(404)
+    allowed = current_app.config.get("INTERNAL_ALLOWED_IPS")
+    if allowed and request.remote_addr not in allowed:
+        abort(404)
+
+
+def server_connections(conn):
+    """(max_connections, connections open to this database) on PostgreSQL."""
+    if conn.dialect.name != "postgresql":
+        return None, None
+    max_connections = int(conn.exec_driver_sql("SHOW max_connections").scalar())
+    in_use = conn.exec_driver_sql(
+        "SELECT count(*) FROM pg_stat_activity WHERE datname = current_database()"
+    ).scalar()
+    return max_connections, in_use
+
+
+@internal_bp.route("/db/pool", methods=["GET"])
+def db_pool():
+    """Pool counters for this worker process plus a round trip to the database.
+
+    Each gunicorn worker has its own pool, so the numbers are per pid.
+    """
+    pool = db.engine.pool
+    status = pool_status(pool)
+    status["pid"] = os.getpid()
+    status["replicas"] = {key: pool_status(engine.pool)
+                          for key, engine in db.engines.items() if key is not None}
+    if status["size"] is not None and status["max_overflow"] is not None:
+        status["process_limit"] = status["size"] + max(status["max_overflow"], 0)
+
+    start = time.perf_counter()
+    try:
+        with db.engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+            max_connections, in_use = server_connections(conn)
+    except Exception as e:
+        current_app.logger.warning("Database health check failed: %s", e)
+        return jsonify({"status": "error", "message": "database unreachable", "pool": status}), 503
+
+    return jsonify({
+        "status": "ok",
+        "latency_ms": round((time.perf_counter() - start) * 1000, 3),
+        "max_connections": max_connections,
+        "server_connections": in_use,
+        "pool": status,
+    }), 200
+
+
+@metrics_bp.route("/metrics", methods=["GET"])
+def metrics_view():
+    return current_app.response_class(metrics.render(), mimetype="text/plain; version=0.0.4")
+
+
+@metrics.collector
+def pool_metrics():
+    samples = []
+    for key, engine in db.engines.items():
+        status = pool_status(engine.pool)
+        labels = {"bind": key or "primary"}
+        for name in ("size", "checkedout", "checkedin", "overflow"):
+            if status[name] is not None:
+                samples.append((f"db_pool_{name}", "gauge", labels, status[name]))
+        wait = status["wait"]
+        if wait is not None:
+            samples += [
+                ("db_pool_checkouts_total", "counter", labels, wait["checkouts"]),
+                ("db_pool_timeouts_total", "counter", labels, wait["timeouts"]),
+                ("db_pool_wait_seconds_total", "counter", labels, wait["total_ms"] / 1000),
+            ]
+    return samples
+
+
+@metrics.collector
+def hashing_metrics():
+    return [
+        ("password_hash_in_flight", "gauge", {}, hasher.in_flight),
+        ("password_hash_queue_size", "gauge", {}, hasher.queue_size),
+        ("password_hash_rejected_total", "counter", {}, hasher.rejected),
+    ]
+
+
+@metrics.collector
+def cache_metrics():
+    return [
+        ("cache_hits_total", "counter", {}, cache.hits),
+        ("cache_misses_total", "counter", {}, cache.misses),
+    ]
@@ -0,0 +1,135 @@
+import json
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from flask_jwt_extended import create_access_token
+from sqlalchemy import event, select
+from sqlalchemy.engine import Engine
+from extensions import db
+from models.data import Data
+from models.service import Service
+from models.user import User
+from diagnostics.seed import seed, SEED_PASSWORD
+
+plans_cli = AppGroup("plans", help="Seed a scratch database and check query plans.")
+
+
+def scenarios():
+    """(name, method, url, json body) for every hot endpoint query.
+
+    Built from rows that exist in the seeded database so every predicate
+    actually matches something.
+    """
+    user = db.session.scalars(select(User).order_by(User.id.desc()).limit(1)).first()
+    service = db.session.scalars(select(Service).order_by(Service.id.desc()).limit(1)).first()
+    record = db.session.scalars(select(Data).order_by(Data.id.desc()).limit(1)).first()
+    fragment = record.name[1:5].lower()
+
+    from api.data import encode_cursor
+    return [
+        ("api.get_data", "GET", "/api/data?page=5&per_page=20", None),
+        ("api.get_data search name", "GET", f"/api/data?search={fragment}&per_page=20", None),
+        ("api.get_data search age", "GET", "/api/data?search=42&per_page=20", None),
+        ("api.get_data search range", "GET", "/api/data?search=20-21&per_page=20", None),
+        ("api.get_data cursor", "GET", f"/api/data?per_page=20&after={encode_cursor(record.id // 2)}", None),
+        ("api.get", "GET", f"/api/data/{record.id}", None),
+        ("api.export_data", "GET", f"/api/data/export?search={fragment}&format=ndjson", None),
+        ("service.get_service", "GET", "/service", None),
+        ("service.getsingle_service", "GET", f"/service/{service.id}", None),
+        ("service.add_service unique check", "POST", "/service",
+         {"service": service.service.upper(), "price": 200}),
+        ("auth.register unique check", "POST", "/auth/register",
+         {"name": "Taken", "email": user.email, "password": "abcd", "phone": user.phone}),
+        ("auth.login", "POST", "/auth/login", {"email": user.email, "password": SEED_PASSWORD}),
+    ]
+
+
+def capture(client, method, url, body, headers):
+    """Run one request and return the (engine, statement, parameters) SELECTs it sent.
+
+    Listens on every Engine, like extensions.profiling, so reads routed to a
+    replica are explained on that replica.
+    """
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if not executemany and statement.lstrip().upper().startswith("SELECT"):
+            statements.append((conn.engine, statement, parameters))
+
+    event.listen(Engine, "before_cursor_execute", record)
+    try:
+        response = client.open(url, method=method, json=body, headers=headers)
+        response.close()
+    finally:
+        event.remove(Engine, "before_cursor_execute", record)
+    return statements
+
+
+def plan_nodes(node):
+    yield node
+    for child in node.get("Plans", []):
+        yield from plan_nodes(child)
+
+
+def sequential_scans(conn, statement, parameters):
+    """Tables the database would read in full to answer ``statement``."""
+    if conn.dialect.name == "postgresql":
+        plan = conn.exec_driver_sql("EXPLAIN (FORMAT JSON) " + statement, parameters).scalar()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return [node["Relation Name"] for node in plan_nodes(plan[0]["Plan"])
+                if node["Node Type"] == "Seq Scan"]
+
+    scans = []
+    for row in conn.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters):
+        detail = row[-1]
+        # "SCAN CONSTANT ROW" is a SELECT without FROM, e.g. around scalar subqueries.
+        if (detail.startswith("SCAN ") and "USING" not in detail and "VIRTUAL TABLE" not in detail
+                and detail != "SCAN CONSTANT ROW"):
+            scans.append(detail.split()[-1])
+    # The catalog tables are tiny and read by design.
+    return [table for table in scans if not table.startswith("sqlite_")]
+
+
+def check_plans():
+    """Explain every scenario's statements; returns (scenario, table, sql) violations.
+
+    Statements without a WHERE clause (full listings and the unfiltered
+    count) read the whole table by design and are skipped.
+    """
+    client = current_app.test_client()
+    headers = {"Authorization": "Bearer " + create_access_token(identity="plans")}
+    violations = []
+
+    for name, method, url, body in scenarios():
+        statements = capture(client, method, url, body, headers)
+        for engine, statement, parameters in statements:
+            flat = " ".join(statement.split())
+            if " WHERE " not in flat.upper():
+                continue
+            with engine.connect() as conn:
+                for table in sequential_scans(conn, statement, parameters):
+                    violations.append((name, table, flat))
+        click.echo(f"{name:<34} {len(statements)} statements")
+    return violations
+
+
+@plans_cli.command("seed")
+@click.option("--rows", default=100000, show_default=True, help="Data rows to insert.")
+@click.option("--users", default=1000, show_default=True)
+@click.option("--services", default=50, show_default=True)
+def seed_command(rows, users, services):
+    """Insert reproducible fake rows. Use a scratch database."""
+    seed(data_rows=rows, users=users, services=services)
+    click.echo(f"Seeded {rows} data rows, {users} users, {services} services")
+
+
+@plans_cli.command("check")
+def check_command():
+    """Fail when an endpoint query would sequentially scan a table."""
+    violations = check_plans()
+    for name, table, statement in violations:
+        click.echo(f"SEQ SCAN on {table} in {name}: {statement}", err=True)
+    if violations:
+        raise SystemExit(1)
+    click.echo("No sequential scans")
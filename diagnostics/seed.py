@@ -0,0 +1,66 @@
+import random
+from datetime import datetime, timedelta
+from sqlalchemy import insert, text
+from werkzeug.security import generate_password_hash
+from extensions import db
+from models.data import Data
+from models.service import Service
+from models.user import User
+
+SYLLABLES = ["ka", "ra", "lu", "mo", "ne", "ti", "sa", "vo", "re", "din", "ash", "el"]
+SEED_PASSWORD = "password"
+BATCH = 5000
+
+
+def random_name(rng):
+    return "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))).capitalize()[:20]
+
+
+def insert_batches(model, rows):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= BATCH:
+            db.session.execute(insert(model), batch)
+            batch = []
+    if batch:
+        db.session.execute(insert(model), batch)
+
+
+def seed(data_rows=100000, users=1000, services=50, seed=42):
+    """Fill the configured database with reproducible fake rows.
+
+    Appends to whatever is there, so point SQLALCHEMY_DATABASE_URI at a
+    scratch database first. Runs ANALYZE afterwards so planner statistics
+    match the new volume.
+    """
+    rng = random.Random(seed)
+    start = datetime(2024, 1, 1)
+
+    def data():
+        for i in range(data_rows):
+            stamp = start + timedelta(seconds=rng.randint(0, 3600 * 24 * 365))
+            yield {"name": random_name(rng), "age": rng.randint(0, 120),
+                   "created_at": stamp, "updated_at": stamp}
+
+    # One cheap hash shared by every seeded account keeps seeding fast.
+    password = generate_password_hash(SEED_PASSWORD, "pbkdf2:sha256:1000")
+
+    def people():
+        for i in range(users):
+            yield {"name": random_name(rng), "email": f"user{seed}_{i}@example.com",
+                   "password": password, "phone": f"+{seed:03d}{i:09d}"}
+
+    def catalog():
+        for i in range(services):
+            yield {"service": f"Seeded service {seed}-{i:05d}", "price": rng.randint(100, 5000),
+                   "created_at": start, "updated_at": start}
+
+    insert_batches(Data, data())
+    insert_batches(User, people())
+    insert_batches(Service, catalog())
+    db.session.commit()
+
+    with db.engine.connect() as conn:
+        conn.execute(text("ANALYZE"))
+        conn.commit()
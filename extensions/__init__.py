@@ -1,7 +1,18 @@
 from flask_sqlalchemy import SQLAlchemy
 from flask_jwt_extended import JWTManager
-from flask_migrate import Migrate
+from extensions.cache import Cache
+from extensions.assets import Assets
+from extensions.hashing import PasswordHasher
+from extensions.routing import RoutingSession
+from extensions.compress import Compress
+from extensions.profiling import Profiler
+from extensions.metrics import Metrics
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={"class_": RoutingSession})
 jwt = JWTManager()
-migrate = Migrate()
+cache = Cache()
+assets = Assets()
+hasher = PasswordHasher()
+compress = Compress()
+profiler = Profiler()
+metrics = Metrics()
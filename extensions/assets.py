@@ -0,0 +1,138 @@
+import gzip, hashlib, mimetypes, os, threading
+import click
+from flask import current_app, request, send_from_directory, url_for
+from flask.cli import AppGroup
+from werkzeug.security import safe_join
+
+try:
+    import brotli
+except ImportError:  # Brotli is optional; gzip siblings are always built.
+    brotli = None
+
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+COMPRESSIBLE = {"css", "js", "mjs", "json", "svg", "txt", "html", "xml", "map", "ico"}
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+assets_cli = AppGroup("assets", help="Build and inspect static assets.")
+
+
+def is_compressible(filename):
+    return "." in filename and filename.rsplit(".", 1)[1].lower() in COMPRESSIBLE
+
+
+def send_asset(folder, filename, immutable=False):
+    """send_from_directory plus precompressed siblings and long-lived caching.
+
+    Range and If-None-Match/If-Modified-Since handling come from Werkzeug's
+    send_file. When SENDFILE_MODE is set the body is left to the web server.
+    """
+    served, encoding = filename, None
+    if is_compressible(filename):
+        for name, suffix in ENCODINGS:
+            path = safe_join(folder, filename + suffix)
+            if request.accept_encodings[name] and path and os.path.isfile(path):
+                served, encoding = filename + suffix, name
+                break
+
+    response = send_from_directory(
+        folder, served,
+        mimetype=mimetypes.guess_type(filename)[0],
+        max_age=IMMUTABLE_MAX_AGE if immutable else None,
+    )
+    if encoding:
+        response.content_encoding = encoding
+    if is_compressible(filename):
+        response.vary.add("Accept-Encoding")
+    if immutable:
+        response.cache_control.immutable = True
+    return response
+
+
+class Assets:
+    def __init__(self):
+        self._hashes = {}
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        app.add_template_global(self.url, "asset_url")
+        app.view_functions["static"] = self.send_static
+        app.after_request(self.accel_redirect)
+        app.cli.add_command(assets_cli)
+        app.extensions["assets"] = self
+
+    def fingerprint(self, filename):
+        path = safe_join(current_app.static_folder, filename)
+        if path is None:
+            raise FileNotFoundError(filename)
+        stat = os.stat(path)
+        key = (path, stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            digest = self._hashes.get(key)
+        if digest is None:
+            sha = hashlib.sha256()
+            with open(path, "rb") as f:
+                for chunk in iter(lambda: f.read(64 * 1024), b""):
+                    sha.update(chunk)
+            digest = sha.hexdigest()[:12]
+            with self._lock:
+                self._hashes[key] = digest
+        return digest
+
+    def url(self, filename):
+        """Static URL carrying a content hash, safe to cache forever."""
+        try:
+            version = self.fingerprint(filename)
+        except OSError:
+            return url_for("static", filename=filename)
+        return url_for("static", filename=filename, v=version)
+
+    def send_static(self, filename):
+        version = request.args.get("v")
+        try:
+            immutable = version is not None and version == self.fingerprint(filename)
+        except OSError:
+            immutable = False
+        return send_asset(current_app.static_folder, filename, immutable=immutable)
+
+    def accel_redirect(self, response):
+        # Werkzeug only knows X-Sendfile (Apache, lighttpd); nginx wants an
+        # internal location instead.
+        if current_app.config.get("SENDFILE_MODE") != "x-accel":
+            return response
+        path = response.headers.pop("X-Sendfile", None)
+        if path:
+            relative = os.path.relpath(path, current_app.root_path).replace(os.sep, "/")
+            response.headers["X-Accel-Redirect"] = f"{current_app.config['X_ACCEL_PREFIX']}/{relative}"
+        return response
+
+
+def compress_file(path):
+    with open(path, "rb") as f:
+        raw = f.read()
+    written = 0
+    targets = [(".gz", lambda data: gzip.compress(data, compresslevel=9, mtime=0))]
+    if brotli is not None:
+        targets.append((".br", lambda data: brotli.compress(data, quality=11)))
+    for suffix, compress in targets:
+        target = path + suffix
+        if os.path.exists(target) and os.path.getmtime(target) >= os.path.getmtime(path):
+            continue
+        data = compress(raw)
+        # A sibling that does not save anything only costs a disk read.
+        if len(data) >= len(raw):
+            continue
+        with open(target, "wb") as f:
+            f.write(data)
+        written += 1
+    return written
+
+
+@assets_cli.command("compress")
+def compress_assets():
+    """Write .gz (and .br with brotli installed) next to compressible static files."""
+    written = 0
+    for root, _, files in os.walk(current_app.static_folder):
+        for name in files:
+            if is_compressible(name):
+                written += compress_file(os.path.join(root, name))
+    click.echo(f"Wrote {written} precompressed files")
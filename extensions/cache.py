@@ -0,0 +1,112 @@
+import json, threading, time
+from collections import OrderedDict
+
+
+class MemoryBackend:
+    """Per-process LRU with a TTL on every entry."""
+
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                return None
+            value, expires_at = item
+            if expires_at < time.monotonic():
+                del self._items[key]
+                return None
+            self._items.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._items[key] = (value, time.monotonic() + ttl)
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_entries:
+                self._items.popitem(last=False)
+
+    def delete(self, *keys):
+        with self._lock:
+            for key in keys:
+                self._items.pop(key, None)
+
+
+class RedisBackend:
+    """Shared cache on any Redis-compatible server, so all workers see one copy.
+
+    Values are stored as JSON, so only JSON-compatible values can be cached.
+    """
+
+    def __init__(self, url):
+        import redis
+
+        self._client = redis.Redis.from_url(url)
+        self._errors = redis.RedisError
+
+    def get(self, key):
+        try:
+            raw = self._client.get(key)
+        except self._errors:
+            return None
+        return json.loads(raw) if raw is not None else None
+
+    def set(self, key, value, ttl):
+        try:
+            self._client.set(key, json.dumps(value), ex=ttl)
+        except self._errors:
+            pass
+
+    def delete(self, *keys):
+        try:
+            self._client.delete(*keys)
+        except self._errors:
+            pass
+
+
+class Cache:
+    """Read-through cache in front of a memory or Redis backend.
+
+    Callers put a version that changes on every write (see
+    api.conditional.collection_version) into the key, so stale entries are
+    never read and age out through the LRU and TTL. A cached version is
+    deleted on commit; that delete reaches other workers only through the
+    Redis backend, so give it a short TTL.
+    """
+
+    def __init__(self):
+        self.backend = MemoryBackend()
+        self.default_ttl = 300
+        self.hits = 0
+        self.misses = 0
+
+    def init_app(self, app):
+        backend = app.config.get("CACHE_BACKEND", "memory")
+        if backend == "redis":
+            self.backend = RedisBackend(app.config["CACHE_URL"])
+        else:
+            self.backend = MemoryBackend(app.config.get("CACHE_MAX_ENTRIES", 1024))
+        self.default_ttl = app.config.get("CACHE_TTL", self.default_ttl)
+        app.extensions["cache"] = self
+
+    def get(self, key):
+        return self.backend.get(key)
+
+    def set(self, key, value, ttl=None):
+        self.backend.set(key, value, ttl or self.default_ttl)
+
+    def delete(self, *keys):
+        self.backend.delete(*keys)
+
+    def get_or_set(self, key, build, ttl=None):
+        value = self.get(key)
+        if value is not None:
+            self.hits += 1
+        else:
+            self.misses += 1
+            value = build()
+            self.set(key, value, ttl)
+        return value
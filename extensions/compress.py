@@ -0,0 +1,145 @@
+import zlib
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # Brotli and zstd are optional; gzip is always available.
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+COMPRESSIBLE_TYPES = {
+    "application/json", "application/x-ndjson", "application/javascript",
+    "application/xml", "image/svg+xml",
+}
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 4
+ZSTD_LEVEL = 3
+
+
+class GzipCompressor:
+    def __init__(self):
+        self._obj = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+
+    def compress(self, data):
+        return self._obj.compress(data)
+
+    def flush(self):
+        return self._obj.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self._obj.flush()
+
+
+class BrotliCompressor:
+    def __init__(self):
+        self._obj = brotli.Compressor(quality=BROTLI_QUALITY)
+
+    def compress(self, data):
+        return self._obj.process(data)
+
+    def flush(self):
+        return self._obj.flush()
+
+    def finish(self):
+        return self._obj.finish()
+
+
+class ZstdCompressor:
+    def __init__(self):
+        self._obj = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compressobj()
+
+    def compress(self, data):
+        return self._obj.compress(data)
+
+    def flush(self):
+        return self._obj.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self):
+        return self._obj.flush()
+
+
+def available_encodings(names):
+    compressors = {"gzip": GzipCompressor}
+    if brotli is not None:
+        compressors["br"] = BrotliCompressor
+    if zstandard is not None:
+        compressors["zstd"] = ZstdCompressor
+    return {name: compressors[name] for name in names if name in compressors}
+
+
+def is_compressible(response):
+    mimetype = response.mimetype or ""
+    return mimetype.startswith("text/") or mimetype in COMPRESSIBLE_TYPES
+
+
+def compress_chunks(body, compressor):
+    """Compress a streamed body chunk by chunk.
+
+    Every chunk is flushed so clients still see an export's rows as they are
+    produced instead of when the compressor's window fills up.
+    """
+    try:
+        for chunk in body:
+            if isinstance(chunk, str):
+                chunk = chunk.encode()
+            data = compressor.compress(chunk) + compressor.flush()
+            if data:
+                yield data
+        yield compressor.finish()
+    finally:
+        if hasattr(body, "close"):
+            body.close()
+
+
+class Compress:
+    """gzip/Brotli/zstd response compression, negotiated from Accept-Encoding.
+
+    Buffered bodies under COMPRESS_MIN_SIZE bytes are left alone. Streamed
+    bodies are compressed incrementally. File responses (send_file, uploads,
+    X-Sendfile) pass through untouched: images are already compressed and
+    static text has precompressed siblings from ``flask assets compress``.
+    """
+
+    def __init__(self):
+        self.min_size = 500
+        self.encodings = {}
+
+    def init_app(self, app):
+        self.min_size = app.config.get("COMPRESS_MIN_SIZE", self.min_size)
+        self.encodings = available_encodings(app.config.get("COMPRESS_ALGORITHMS", ("br", "zstd", "gzip")))
+        app.after_request(self.after_request)
+        app.extensions["compress"] = self
+
+    def after_request(self, response):
+        if (response.direct_passthrough
+                or "Content-Encoding" in response.headers
+                or not 200 <= response.status_code < 300
+                or response.status_code in (204, 206)
+                or not is_compressible(response)):
+            return response
+
+        response.vary.add("Accept-Encoding")
+        encoding = request.accept_encodings.best_match(list(self.encodings))
+        if encoding is None:
+            return response
+
+        if response.is_streamed:
+            response.response = compress_chunks(response.response, self.encodings[encoding]())
+            response.headers.pop("Content-Length", None)
+        else:
+            body = response.get_data()
+            if len(body) < self.min_size:
+                return response
+            compressor = self.encodings[encoding]()
+            response.set_data(compressor.compress(body) + compressor.finish())
+
+        response.content_encoding = encoding
+        # A strong validator must differ per encoding; weak ones may be shared.
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+        return response
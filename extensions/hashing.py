@@ -0,0 +1,85 @@
+import os, threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from werkzeug.exceptions import ServiceUnavailable
+from werkzeug.security import generate_password_hash, check_password_hash
+
+
+class HashingBusy(ServiceUnavailable):
+    description = "Too many password operations in progress, retry shortly."
+
+
+class PasswordHasher:
+    """Runs password hashing on a bounded worker pool.
+
+    HASH_EXECUTOR picks "process" (default, sidesteps the GIL), "thread" or
+    "inline". At most HASH_QUEUE_SIZE operations may be queued or running per
+    worker process; a caller that cannot get a slot within HASH_QUEUE_TIMEOUT
+    seconds gets HashingBusy (503 with Retry-After) instead of piling up.
+    """
+
+    def __init__(self):
+        self.method = "scrypt"
+        self.mode = "inline"
+        self.workers = 1
+        self.queue_timeout = 0.5
+        self.retry_after = 1
+        self.queue_size = 4
+        self.in_flight = 0
+        self.rejected = 0
+        self._slots = threading.BoundedSemaphore(4)
+        self._executor = None
+        self._pid = None
+        self._prefix = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.method = app.config.get("PASSWORD_HASH_METHOD", self.method)
+        self.mode = app.config.get("HASH_EXECUTOR", "process")
+        self.workers = app.config.get("HASH_WORKERS") or os.cpu_count() or 1
+        self.queue_timeout = app.config.get("HASH_QUEUE_TIMEOUT", self.queue_timeout)
+        self.retry_after = app.config.get("HASH_RETRY_AFTER", self.retry_after)
+        self.queue_size = app.config.get("HASH_QUEUE_SIZE") or self.workers * 4
+        self._slots = threading.BoundedSemaphore(self.queue_size)
+        app.extensions["hasher"] = self
+
+    def _get_executor(self):
+        with self._lock:
+            # A pool inherited through fork (gunicorn --preload) has no live
+            # workers in the child, so every process builds its own.
+            if self._executor is None or self._pid != os.getpid():
+                if self.mode == "process":
+                    self._executor = ProcessPoolExecutor(max_workers=self.workers)
+                else:
+                    self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="hashing")
+                self._pid = os.getpid()
+            return self._executor
+
+    def _run(self, fn, *args):
+        if self.mode == "inline":
+            return fn(*args)
+        if not self._slots.acquire(timeout=self.queue_timeout):
+            with self._lock:
+                self.rejected += 1
+            raise HashingBusy(retry_after=self.retry_after)
+        with self._lock:
+            self.in_flight += 1
+        try:
+            return self._get_executor().submit(fn, *args).result()
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+            self._slots.release()
+
+    def hash(self, password):
+        return self._run(generate_password_hash, password, self.method)
+
+    def verify(self, pwhash, password):
+        return self._run(check_password_hash, pwhash, password)
+
+    def needs_rehash(self, pwhash):
+        """True when a stored hash was made with other cost parameters."""
+        if self._prefix is None:
+            # "scrypt" expands to "scrypt:32768:8:1" and so on; let Werkzeug
+            # spell out the configured defaults once.
+            self._prefix = generate_password_hash("", self.method).split("$", 1)[0]
+        return pwhash.split("$", 1)[0] != self._prefix
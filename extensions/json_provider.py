@@ -0,0 +1,74 @@
+from datetime import date, datetime, timezone
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; the stdlib json module is the fallback.
+    orjson = None
+
+WEEKDAYS = ("Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun")
+MONTHS = ("Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec")
+ORJSON_KWARGS = {"default", "sort_keys", "indent", "separators", "ensure_ascii"}
+
+
+def http_date(value):
+    """werkzeug.http.http_date without the email.utils round trip.
+
+    Naive datetimes are taken as UTC, like Werkzeug does.
+    """
+    if not isinstance(value, datetime):
+        value = datetime(value.year, value.month, value.day)
+    elif value.tzinfo is not None:
+        value = value.astimezone(timezone.utc)
+    return (f"{WEEKDAYS[value.weekday()]}, {value.day:02d} {MONTHS[value.month - 1]} "
+            f"{value.year:04d} {value.hour:02d}:{value.minute:02d}:{value.second:02d} GMT")
+
+
+def default(o):
+    if isinstance(o, date):
+        return http_date(o)
+    return DefaultJSONProvider.default(o)
+
+
+class JSONProvider(DefaultJSONProvider):
+    """Flask's JSON provider on orjson when it is installed.
+
+    Like the stdlib provider it sorts keys, writes dates as RFC 822 strings
+    and converts non-string dict keys. Unlike it, non-ASCII text is written
+    as UTF-8 rather than \\u escapes (ensure_ascii is False here) and dumps()
+    is always compact. Setting ensure_ascii, passing ensure_ascii=True or
+    passing a keyword orjson has no equivalent for uses the stdlib encoder.
+    """
+
+    default = staticmethod(default)
+    ensure_ascii = False
+
+    def _options(self, sort_keys=None, indent=None):
+        option = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+        if self.sort_keys if sort_keys is None else sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return option
+
+    def dumps(self, obj, **kwargs):
+        if (orjson is None or not kwargs.keys() <= ORJSON_KWARGS
+                or kwargs.get("ensure_ascii", self.ensure_ascii)):
+            return super().dumps(obj, **kwargs)
+        option = self._options(kwargs.get("sort_keys"), kwargs.get("indent"))
+        return orjson.dumps(obj, default=kwargs.get("default", self.default), option=option).decode()
+
+    def loads(self, s, **kwargs):
+        if orjson is None or kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        if orjson is None or self.ensure_ascii:
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        # Straight to bytes; the stdlib path builds a str and encodes it again.
+        body = orjson.dumps(obj, default=self.default,
+                            option=self._options(indent=indent) | orjson.OPT_APPEND_NEWLINE)
+        return self._app.response_class(body, mimetype=self.mimetype)
@@ -0,0 +1,249 @@
+import glob, json, os, threading, time
+from flask import g, request
+from extensions.profiling import current_timing
+
+# Counters and histograms of exited processes, see archive_process.
+ARCHIVE = "archive.json"
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def label_key(labels):
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def escape(value):
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def format_labels(labels, extra=()):
+    pairs = [*labels, *extra]
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{escape(value)}"' for name, value in pairs) + "}"
+
+
+class Registry:
+    """Counters and histograms of one process, mergeable with other processes'."""
+
+    def __init__(self):
+        self.counters = {}
+        self.histograms = {}
+        self._lock = threading.Lock()
+
+    def inc(self, name, amount=1, **labels):
+        key = (name, label_key(labels))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    def observe(self, name, value, buckets=DEFAULT_BUCKETS, **labels):
+        key = (name, label_key(labels))
+        with self._lock:
+            entry = self.histograms.get(key)
+            if entry is None:
+                entry = self.histograms[key] = {"buckets": list(buckets), "counts": [0] * len(buckets),
+                                                "sum": 0.0, "count": 0}
+            for i, bound in enumerate(entry["buckets"]):
+                if value <= bound:
+                    entry["counts"][i] += 1
+                    break
+            entry["sum"] += value
+            entry["count"] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "counters": [[name, labels, value] for (name, labels), value in self.counters.items()],
+                "histograms": [[name, labels, dict(entry, counts=list(entry["counts"]))]
+                               for (name, labels), entry in self.histograms.items()],
+            }
+
+
+def merge(snapshots):
+    """Sum counters and histograms from several process snapshots."""
+    counters, histograms = {}, {}
+    for snap in snapshots:
+        for name, labels, value in snap["counters"]:
+            key = (name, tuple(map(tuple, labels)))
+            counters[key] = counters.get(key, 0) + value
+        for name, labels, entry in snap["histograms"]:
+            key = (name, tuple(map(tuple, labels)))
+            total = histograms.get(key)
+            if total is None:
+                histograms[key] = dict(entry, counts=list(entry["counts"]))
+                continue
+            total["counts"] = [a + b for a, b in zip(total["counts"], entry["counts"])]
+            total["sum"] += entry["sum"]
+            total["count"] += entry["count"]
+    return counters, histograms
+
+
+def read_snapshot(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def write_snapshot(path, snap):
+    with open(path + ".tmp", "w") as f:
+        json.dump(snap, f)
+    os.replace(path + ".tmp", path)
+
+
+def clear_directory(directory):
+    """Remove every snapshot, so a new server does not add the last run's totals."""
+    for path in glob.glob(os.path.join(directory, "*.json*")):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def archive_process(directory, pid):
+    """Fold an exited process's counters and histograms into ARCHIVE and drop its file.
+
+    Its sampled values die with it, and a later process reusing the pid
+    starts from an empty file.
+    """
+    path = os.path.join(directory, f"{pid}.json")
+    snap = read_snapshot(path)
+    if snap is None:
+        return
+    archive_path = os.path.join(directory, ARCHIVE)
+    archive = read_snapshot(archive_path) or {"counters": [], "histograms": []}
+    counters, histograms = merge([archive, snap])
+    write_snapshot(archive_path, {
+        "counters": [[name, labels, value] for (name, labels), value in counters.items()],
+        "histograms": [[name, labels, entry] for (name, labels), entry in histograms.items()],
+    })
+    os.remove(path)
+
+
+def pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class Metrics:
+    """Prometheus text-format metrics.
+
+    Request latency and DB time are histograms per endpoint, method and
+    status. Collectors registered with ``collector`` sample per-process state
+    (pool, hashing queue, cache) when a snapshot is taken.
+
+    With METRICS_DIR set, every worker writes its snapshot to
+    METRICS_DIR/<pid>.json at most every METRICS_FLUSH_INTERVAL seconds and a
+    scrape merges all files, so any gunicorn worker can answer /metrics.
+    gunicorn.conf.py empties the directory when the server starts and moves
+    an exited worker's counters into ARCHIVE; its sampled values are dropped.
+    """
+
+    def __init__(self):
+        self.registry = Registry()
+        self.collectors = []
+        self.directory = None
+        self.flush_interval = 5
+        self._flushed = 0.0
+        self._flush_lock = threading.Lock()
+
+    def init_app(self, app):
+        self.directory = app.config.get("METRICS_DIR")
+        self.flush_interval = app.config.get("METRICS_FLUSH_INTERVAL", self.flush_interval)
+        if self.directory:
+            os.makedirs(self.directory, exist_ok=True)
+        app.before_request(self.before_request)
+        app.after_request(self.after_request)
+        app.extensions["metrics"] = self
+
+    def collector(self, fn):
+        """Register ``fn() -> [(name, type, labels dict, value)]``, sampled per process."""
+        self.collectors.append(fn)
+        return fn
+
+    def inc(self, name, amount=1, **labels):
+        self.registry.inc(name, amount, **labels)
+
+    def observe(self, name, value, **labels):
+        self.registry.observe(name, value, **labels)
+
+    def before_request(self):
+        g.metrics_start = time.perf_counter()
+
+    def after_request(self, response):
+        start = g.pop("metrics_start", None)
+        if start is None:
+            return response
+        labels = {"endpoint": request.endpoint or "unmatched", "method": request.method,
+                  "status": response.status_code}
+        self.observe("http_request_duration_seconds", time.perf_counter() - start, **labels)
+        timing = current_timing()
+        if timing is not None:
+            self.inc("db_queries_total", timing.queries, endpoint=labels["endpoint"])
+            self.observe("http_request_db_seconds", timing.db_time, endpoint=labels["endpoint"])
+        if self.directory and time.monotonic() - self._flushed >= self.flush_interval:
+            self.flush()
+        return response
+
+    def sample(self):
+        samples = []
+        for collect in self.collectors:
+            for name, kind, labels, value in collect():
+                samples.append([name, kind, label_key(labels), value])
+        return samples
+
+    def flush(self):
+        """Write this process's snapshot to METRICS_DIR; needs an app context."""
+        with self._flush_lock:
+            snap = self.registry.snapshot()
+            snap["samples"] = self.sample()
+            write_snapshot(os.path.join(self.directory, f"{os.getpid()}.json"), snap)
+            self._flushed = time.monotonic()
+
+    def render(self):
+        if not self.directory:
+            snap = self.registry.snapshot()
+            counters, histograms = merge([snap])
+            samples = [(name, kind, labels, value, ()) for name, kind, labels, value in self.sample()]
+        else:
+            self.flush()
+            snapshots, samples = [], []
+            for path in glob.glob(os.path.join(self.directory, "*.json")):
+                snap = read_snapshot(path)
+                if snap is None:
+                    continue
+                snapshots.append(snap)
+                pid = os.path.basename(path).split(".", 1)[0]
+                if pid.isdigit() and pid_alive(int(pid)):
+                    samples += [(name, kind, tuple(map(tuple, labels)), value, (("pid", pid),))
+                                for name, kind, labels, value in snap.get("samples", [])]
+            counters, histograms = merge(snapshots)
+
+        lines, typed = [], set()
+
+        def declare(name, kind):
+            if name not in typed:
+                typed.add(name)
+                lines.append(f"# TYPE {name} {kind}")
+
+        for (name, labels), value in sorted(counters.items()):
+            declare(name, "counter")
+            lines.append(f"{name}{format_labels(labels)} {value}")
+        for (name, labels), entry in sorted(histograms.items()):
+            declare(name, "histogram")
+            cumulative = 0
+            for bound, count in zip(entry["buckets"], entry["counts"]):
+                cumulative += count
+                lines.append(f"{name}_bucket{format_labels(labels, [('le', str(bound))])} {cumulative}")
+            lines.append(f"{name}_bucket{format_labels(labels, [('le', '+Inf')])} {entry['count']}")
+            lines.append(f"{name}_sum{format_labels(labels)} {entry['sum']}")
+            lines.append(f"{name}_count{format_labels(labels)} {entry['count']}")
+        for name, kind, labels, value, extra in sorted(samples, key=lambda s: (s[0], s[2], s[4])):
+            declare(name, kind)
+            lines.append(f"{name}{format_labels(labels, extra)} {value}")
+        return "\n".join(lines) + "\n"
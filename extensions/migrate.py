@@ -0,0 +1,18 @@
+import click
+from flask import current_app
+
+
+class MigrateCommands(click.Group):
+    """``flask db``, with Flask-Migrate (and Alembic, a large share of the
+    app's import time) imported only when the command is actually run."""
+
+    def __init__(self, db):
+        super().__init__("db", help="Perform database migrations.")
+        self.db = db
+
+    def make_context(self, info_name, args, parent=None, **extra):
+        from flask_migrate import Migrate
+        from flask_migrate.cli import db as db_group
+        if "migrate" not in current_app.extensions:
+            Migrate(current_app, self.db)
+        return db_group.make_context(info_name, args, parent=parent, **extra)
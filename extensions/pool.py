@@ -0,0 +1,64 @@
+import threading, time
+from sqlalchemy import exc
+from sqlalchemy.pool import QueuePool
+
+
+class WaitStats:
+    def __init__(self):
+        self.checkouts = 0
+        self.timeouts = 0
+        self.total = 0.0
+        self.max = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, seconds, timed_out=False):
+        with self._lock:
+            self.checkouts += 1
+            self.timeouts += timed_out
+            self.total += seconds
+            self.max = max(self.max, seconds)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "total_ms": round(self.total * 1000, 3),
+                "avg_ms": round(self.total * 1000 / self.checkouts, 3) if self.checkouts else 0.0,
+                "max_ms": round(self.max * 1000, 3),
+            }
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that records how long each checkout took.
+
+    The time covers waiting for a free connection, opening an overflow
+    connection and the pre-ping, i.e. everything a request sits through
+    before its first query can run.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.wait_stats = WaitStats()
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            connection = super().connect()
+        except exc.TimeoutError:
+            self.wait_stats.record(time.perf_counter() - start, timed_out=True)
+            raise
+        self.wait_stats.record(time.perf_counter() - start)
+        return connection
+
+
+def pool_status(pool):
+    """Counters for ``pool``; QueuePool-only numbers are None for other pools."""
+    status = {"class": type(pool).__name__}
+    for name in ("size", "checkedin", "checkedout", "overflow", "timeout"):
+        method = getattr(pool, name, None)
+        status[name] = method() if callable(method) else None
+    status["max_overflow"] = getattr(pool, "_max_overflow", None)
+    stats = getattr(pool, "wait_stats", None)
+    status["wait"] = stats.snapshot() if stats is not None else None
+    return status
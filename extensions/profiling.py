@@ -0,0 +1,137 @@
+import cProfile, io, os, pstats, random, re, time
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+class RequestTiming:
+    __slots__ = ("start", "db_time", "queries", "serialize_time", "profile")
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.db_time = 0.0
+        self.queries = 0
+        self.serialize_time = 0.0
+        self.profile = None
+
+    @property
+    def elapsed(self):
+        return time.perf_counter() - self.start
+
+
+def current_timing():
+    """RequestTiming of the active request, or None outside one."""
+    return g.get("request_timing") if has_request_context() else None
+
+
+def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    start = conn.info["query_start"].pop()
+    timing = current_timing()
+    if timing is not None:
+        timing.db_time += time.perf_counter() - start
+        timing.queries += 1
+
+
+def handle_error(exception_context):
+    # A failed statement never reaches after_cursor_execute; drop its start
+    # time so the connection's next statements pop their own.
+    conn = exception_context.connection
+    if conn is not None and exception_context.statement is not None and conn.info.get("query_start"):
+        conn.info["query_start"].pop()
+
+
+class Profiler:
+    """Per-request timing reported in a Server-Timing header.
+
+    Every request gets DB time and query count (from cursor events on all
+    engines), JSON serialization time and total time. PROFILE_SAMPLE_RATE of
+    requests also run under cProfile; those slower than PROFILE_SLOW_MS are
+    written to PROFILE_DIR as a .prof file plus a readable .txt summary.
+    """
+
+    def __init__(self):
+        self.enabled = True
+        self.sample_rate = 0.0
+        self.slow_ms = 500
+        self.directory = None
+
+    def init_app(self, app):
+        self.enabled = app.config.get("PROFILING", True)
+        if not self.enabled:
+            return
+        self.sample_rate = app.config.get("PROFILE_SAMPLE_RATE", self.sample_rate)
+        self.slow_ms = app.config.get("PROFILE_SLOW_MS", self.slow_ms)
+        self.directory = app.config.get("PROFILE_DIR") or os.path.join(app.instance_path, "profiles")
+
+        if not event.contains(Engine, "before_cursor_execute", before_cursor_execute):
+            event.listen(Engine, "before_cursor_execute", before_cursor_execute)
+            event.listen(Engine, "after_cursor_execute", after_cursor_execute)
+            event.listen(Engine, "handle_error", handle_error)
+        app.json.response = self._timed(app.json.response)
+        app.before_request(self.before_request)
+        app.after_request(self.after_request)
+        app.teardown_request(self.teardown_request)
+        app.extensions["profiler"] = self
+
+    def _timed(self, serialize):
+        def response(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return serialize(*args, **kwargs)
+            finally:
+                timing = current_timing()
+                if timing is not None:
+                    timing.serialize_time += time.perf_counter() - start
+        return response
+
+    def before_request(self):
+        timing = g.request_timing = RequestTiming()
+        if self.sample_rate and random.random() < self.sample_rate:
+            profile = cProfile.Profile()
+            try:
+                profile.enable()
+            except ValueError:  # Another profiler is already active on this thread.
+                return
+            timing.profile = profile
+
+    def after_request(self, response):
+        timing = current_timing()
+        if timing is None:
+            return response
+        total = timing.elapsed
+        # Streamed bodies are still to be produced, so this is time to first byte.
+        response.headers["Server-Timing"] = (
+            f'db;dur={timing.db_time * 1000:.1f};desc="{timing.queries} queries", '
+            f"serialize;dur={timing.serialize_time * 1000:.1f}, "
+            f"total;dur={total * 1000:.1f}"
+        )
+        if timing.profile is not None:
+            timing.profile.disable()
+            if total * 1000 >= self.slow_ms:
+                self.dump(timing.profile, total)
+            timing.profile = None
+        return response
+
+    def teardown_request(self, exc):
+        # after_request does not run when the view raised.
+        timing = current_timing()
+        if timing is not None and timing.profile is not None:
+            timing.profile.disable()
+            timing.profile = None
+
+    def dump(self, profile, total):
+        os.makedirs(self.directory, exist_ok=True)
+        endpoint = re.sub(r"[^A-Za-z0-9_.-]", "_", request.endpoint or "unmatched")
+        stamp = time.strftime("%Y%m%dT%H%M%S")
+        base = os.path.join(self.directory, f"{stamp}-{endpoint}-{total * 1000:.0f}ms-{os.getpid()}")
+        profile.dump_stats(base + ".prof")
+
+        summary = io.StringIO()
+        summary.write(f"{request.method} {request.full_path}  {total * 1000:.1f} ms\n\n")
+        pstats.Stats(profile, stream=summary).sort_stats("cumulative").print_stats(40)
+        with open(base + ".txt", "w") as f:
+            f.write(summary.getvalue())
@@ -0,0 +1,69 @@
+import contextvars
+from contextlib import contextmanager
+from functools import wraps
+from flask import current_app, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+_counters = contextvars.ContextVar("query_counters", default=())
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+class QueryCounter:
+    def __init__(self):
+        self.statements = []
+
+    @property
+    def count(self):
+        return len(self.statements)
+
+
+@contextmanager
+def count_queries():
+    """Collect every SQL statement run inside the block, on any engine.
+
+        with count_queries() as queries:
+            client.get("/api/data")
+        assert queries.count <= 2, queries.statements
+    """
+    counter = QueryCounter()
+    token = _counters.set(_counters.get() + (counter,))
+    try:
+        yield counter
+    finally:
+        _counters.reset(token)
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def record_statement(conn, cursor, statement, parameters, context, executemany):
+    for counter in _counters.get():
+        counter.statements.append(statement)
+
+
+def query_budget(limit):
+    """Flag a view that runs more than ``limit`` SQL statements.
+
+    QUERY_BUDGET_MODE "warn" logs the statements, "raise" fails the request
+    with QueryBudgetExceeded (the testing profile) and "off" skips counting.
+    Place it above @conditional so the validator query is counted too.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            mode = current_app.config.get("QUERY_BUDGET_MODE", "off")
+            if mode == "off":
+                return view(*args, **kwargs)
+            with count_queries() as queries:
+                response = view(*args, **kwargs)
+            if queries.count > limit:
+                message = (f"{request.endpoint} ran {queries.count} queries, budget is {limit}:\n  "
+                           + "\n  ".join(" ".join(s.split()) for s in queries.statements))
+                if mode == "raise":
+                    raise QueryBudgetExceeded(message)
+                current_app.logger.warning(message)
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,65 @@
+import random, re
+from flask import has_request_context, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+from sqlalchemy.sql.elements import TextClause
+from sqlalchemy.sql.selectable import TextualSelect
+
+READ_METHODS = ("GET", "HEAD")
+REPLICA_PREFIX = "replica"
+
+# Raw SQL that only reads: a SELECT (or SHOW) that neither locks rows nor
+# creates a table with SELECT ... INTO. CTEs can hide writes, so WITH stays
+# on the primary.
+READ_SQL = re.compile(r"^\s*(SELECT|SHOW)\b", re.IGNORECASE)
+WRITE_IN_READ_SQL = re.compile(r"\bFOR\s+(NO\s+KEY\s+UPDATE|UPDATE|KEY\s+SHARE|SHARE)\b|\bINTO\b", re.IGNORECASE)
+
+
+def is_plain_read(clause):
+    if isinstance(clause, TextualSelect):
+        clause = clause.element
+    if isinstance(clause, TextClause):
+        return bool(READ_SQL.match(clause.text)) and not WRITE_IN_READ_SQL.search(clause.text)
+    return getattr(clause, "is_select", False) and getattr(clause, "_for_update_arg", None) is None
+
+
+class RoutingSession(Session):
+    """Session that sends the SELECTs of GET/HEAD requests to a read replica.
+
+    Replicas are the SQLALCHEMY_BINDS entries whose key starts with
+    "replica". Once the session writes anything (a flush, a bulk statement,
+    SELECT ... FOR UPDATE) or ``pin_primary`` is called, the rest of the
+    request stays on the primary so it reads its own writes.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and clause is not None:
+            if not is_plain_read(clause):
+                self.info["primary"] = True
+            elif self._use_replica():
+                replica = self._replica()
+                if replica is not None:
+                    return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+    def _use_replica(self):
+        return (not self.info.get("primary")
+                and has_request_context() and request.method in READ_METHODS)
+
+    def _replica(self):
+        # One replica per session, so a request never mixes two lag levels.
+        if "replica" not in self.info:
+            keys = [key for key in self._db.engines if key and key.startswith(REPLICA_PREFIX)]
+            self.info["replica"] = random.choice(keys) if keys else None
+        key = self.info["replica"]
+        return self._db.engines[key] if key else None
+
+
+@event.listens_for(RoutingSession, "after_flush")
+def stick_to_primary(session, flush_context):
+    session.info["primary"] = True
+
+
+def pin_primary(session):
+    """Route the rest of this session's queries to the primary."""
+    session.info["primary"] = True
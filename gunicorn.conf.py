@@ -0,0 +1,91 @@
+"""gunicorn settings: ``gunicorn -c gunicorn.conf.py``.
+
+With preload_app (the default here) the app is built once in the master and
+forked workers share its pages copy-on-write instead of each importing and
+constructing everything again. With UPLOAD_GC_INTERVAL set, the upload
+sweeper then runs on a thread in the master, started once it is ready,
+instead of once per worker.
+"""
+import gc, os
+
+wsgi_app = "app:create_app()"
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WEB_CONCURRENCY", 2))
+preload_app = os.getenv("GUNICORN_PRELOAD", "1").lower() not in ("0", "false", "no")
+
+if preload_app:
+    # A collection while the app loads would leave freed holes in pages the
+    # workers are about to share.
+    gc.disable()
+
+
+def app_settings(server):
+    """The app's config, without building the app in the master unless it is preloaded anyway."""
+    if server.cfg.preload_app:
+        return server.app.wsgi().config
+    from dotenv import load_dotenv
+    from flask import Config
+    load_dotenv()
+    from config import get_config
+    settings = Config(os.getcwd())
+    settings.from_object(get_config())
+    return settings
+
+
+def on_starting(server):
+    # Totals restart with the server; a previous run's snapshots would be
+    # summed in forever and a reused pid would revive a dead worker's samples.
+    directory = app_settings(server)["METRICS_DIR"]
+    if directory:
+        from extensions.metrics import clear_directory
+        clear_directory(directory)
+
+
+def when_ready(server):
+    # Objects built during preload move to the permanent generation, so
+    # collections never write to their (shared) headers again.
+    gc.freeze()
+    gc.enable()
+
+    interval = app_settings(server)["UPLOAD_GC_INTERVAL"]
+    if not interval:
+        return
+    if not server.cfg.preload_app:
+        # Building the app here would hand the master's copy, pool included,
+        # to every worker forked after it.
+        server.log.warning("UPLOAD_GC_INTERVAL needs preload_app; run \"flask uploads sweep\" instead")
+        return
+    from api.service import UPLOAD_FOLDER
+    from api.storage import start_sweeper
+    start_sweeper(server.app.wsgi(), UPLOAD_FOLDER, interval)
+
+
+def pre_fork(server, worker):
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    if not server.cfg.preload_app:
+        return
+    # A pooled connection is a socket; one inherited from the master must
+    # never be used by two processes.
+    from extensions import db
+    app = server.app.wsgi()
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
+
+
+def worker_exit(server, worker):
+    # Counters since the worker's last periodic flush.
+    from extensions import metrics
+    if metrics.directory:
+        with server.app.wsgi().app_context():
+            metrics.flush()
+
+
+def child_exit(server, worker):
+    directory = app_settings(server)["METRICS_DIR"]
+    if directory:
+        from extensions.metrics import archive_process
+        archive_process(directory, worker.pid)
@@ -1,3 +1,4 @@
+import functools
 import logging
 from logging.config import fileConfig
 
@@ -51,6 +52,23 @@ def get_metadata():
     return target_db.metadata
 
 
+def include_object(object, name, type_, reflected, compare_to, dialect=None):
+    """Leave dialect-specific search objects out of autogenerate.
+
+    Indexes declared with ``ddl_if(dialect=...)`` only exist on that dialect,
+    and SQLite's data_fts table (plus its FTS5 shadow tables) is created by
+    the search migration rather than by a model.
+    """
+    ddl_if = getattr(object, '_ddl_if', None)
+    if ddl_if is not None and ddl_if.dialect is not None and dialect is not None:
+        dialects = (ddl_if.dialect,) if isinstance(ddl_if.dialect, str) else ddl_if.dialect
+        if dialect not in dialects:
+            return False
+    if type_ == 'table' and reflected and name.startswith('data_fts'):
+        return False
+    return True
+
+
 def run_migrations_offline():
     """Run migrations in 'offline' mode.
 
@@ -95,6 +113,9 @@ def run_migrations_online():
         conf_args["process_revision_directives"] = process_revision_directives
 
     connectable = get_engine()
+    if conf_args.get("include_object") is None:
+        conf_args["include_object"] = functools.partial(
+            include_object, dialect=connectable.dialect.name)
 
     with connectable.connect() as connection:
         context.configure(
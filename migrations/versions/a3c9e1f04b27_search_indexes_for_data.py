@@ -0,0 +1,73 @@
+"""search indexes for data
+
+Revision ID: a3c9e1f04b27
+Revises: 622e396ffa5b
+Create Date: 2026-10-18 10:12:41.503118
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a3c9e1f04b27'
+down_revision = '622e396ffa5b'
+branch_labels = None
+depends_on = None
+
+
+SQLITE_FTS_TABLE = (
+    "CREATE VIRTUAL TABLE data_fts USING fts5("
+    "name, content='data', content_rowid='id', tokenize='trigram')"
+)
+
+SQLITE_FTS_TRIGGERS = [
+    """
+    CREATE TRIGGER data_fts_ai AFTER INSERT ON data BEGIN
+        INSERT INTO data_fts(rowid, name) VALUES (new.id, new.name);
+    END
+    """,
+    """
+    CREATE TRIGGER data_fts_ad AFTER DELETE ON data BEGIN
+        INSERT INTO data_fts(data_fts, rowid, name) VALUES ('delete', old.id, old.name);
+    END
+    """,
+    """
+    CREATE TRIGGER data_fts_au AFTER UPDATE OF name ON data BEGIN
+        INSERT INTO data_fts(data_fts, rowid, name) VALUES ('delete', old.id, old.name);
+        INSERT INTO data_fts(rowid, name) VALUES (new.id, new.name);
+    END
+    """,
+]
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+
+    op.create_index('ix_data_age', 'data', ['age'], unique=False)
+
+    if dialect == 'postgresql':
+        op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        op.create_index(
+            'ix_data_name_trgm', 'data', ['name'], unique=False,
+            postgresql_using='gin',
+            postgresql_ops={'name': 'gin_trgm_ops'},
+        )
+    elif dialect == 'sqlite':
+        op.execute(SQLITE_FTS_TABLE)
+        for trigger in SQLITE_FTS_TRIGGERS:
+            op.execute(trigger)
+        op.execute("INSERT INTO data_fts(data_fts) VALUES ('rebuild')")
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+
+    if dialect == 'sqlite':
+        for name in ('data_fts_au', 'data_fts_ad', 'data_fts_ai'):
+            op.execute(f'DROP TRIGGER IF EXISTS {name}')
+        op.execute('DROP TABLE IF EXISTS data_fts')
+    elif dialect == 'postgresql':
+        op.drop_index('ix_data_name_trgm', table_name='data')
+
+    op.drop_index('ix_data_age', table_name='data')
@@ -0,0 +1,40 @@
+"""indexes for hot predicates
+
+Revision ID: b7d2c4e8f1a6
+Revises: a3c9e1f04b27
+Create Date: 2026-10-18 15:40:07.218934
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7d2c4e8f1a6'
+down_revision = 'a3c9e1f04b27'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_user_phone'), ['phone'], unique=False)
+
+    with op.batch_alter_table('data', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_data_name'), ['name'], unique=False)
+        batch_op.create_index(batch_op.f('ix_data_created_at'), ['created_at'], unique=False)
+        batch_op.create_index(batch_op.f('ix_data_updated_at'), ['updated_at'], unique=False)
+
+    op.create_index('ix_service_service_lower', 'service', [sa.text('lower(service)')], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_service_service_lower', table_name='service')
+
+    with op.batch_alter_table('data', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_data_updated_at'))
+        batch_op.drop_index(batch_op.f('ix_data_created_at'))
+        batch_op.drop_index(batch_op.f('ix_data_name'))
+
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_user_phone'))
@@ -0,0 +1,38 @@
+"""table versions
+
+Revision ID: c5f8a2d3e9b1
+Revises: b7d2c4e8f1a6
+Create Date: 2026-10-19 09:21:44.610382
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c5f8a2d3e9b1'
+down_revision = 'b7d2c4e8f1a6'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    table_version = op.create_table('table_version',
+    sa.Column('name', sa.String(length=64), nullable=False),
+    sa.Column('version', sa.BigInteger(), nullable=False),
+    sa.PrimaryKeyConstraint('name')
+    )
+    op.bulk_insert(table_version, [
+        {'name': 'data', 'version': 0},
+        {'name': 'service', 'version': 0},
+    ])
+
+    with op.batch_alter_table('service', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_service_updated_at'), ['updated_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('service', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_service_updated_at'))
+
+    op.drop_table('table_version')
@@ -3,11 +3,20 @@ from datetime import datetime
 
 class Data(db.Model):
     __tablename__ = "data"
+    __table_args__ = (
+        # Substring search index. Elsewhere it would be a second plain btree
+        # next to ix_data_name; SQLite searches through the data_fts table.
+        db.Index(
+            "ix_data_name_trgm", "name",
+            postgresql_using="gin",
+            postgresql_ops={"name": "gin_trgm_ops"},
+        ).ddl_if(dialect="postgresql"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
-    name = db.Column(db.String(20), nullable=False)
-    age = db.Column(db.Integer, nullable=False)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    name = db.Column(db.String(20), nullable=False, index=True)
+    age = db.Column(db.Integer, nullable=False, index=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
 
 
@@ -9,4 +9,7 @@ class Service(db.Model):
     service = db.Column(db.String(150), unique=True, nullable=False)
     price = db.Column(db.Float, nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
+
+# Serves the case-insensitive uniqueness check in ServiceSchema.
+db.Index("ix_service_service_lower", db.func.lower(Service.service))
@@ -0,0 +1,9 @@
+from extensions import db
+
+
+class TableVersion(db.Model):
+    """Write generation of a table, bumped after every commit that changes it."""
+    __tablename__ = "table_version"
+
+    name = db.Column(db.String(64), primary_key=True)
+    version = db.Column(db.BigInteger, nullable=False, default=0)
@@ -9,7 +9,7 @@ class User(db.Model):
     name = db.Column(db.String(20), nullable=False)
     email = db.Column(db.String(50), unique=True, nullable=False)
     password = db.Column(db.String(255), nullable=False)
-    phone = db.Column(db.String(15),nullable=False)
+    phone = db.Column(db.String(15),nullable=False, index=True)
     created_at = db.Column(db.DateTime, default=datetime.now(timezone.utc))
 
    
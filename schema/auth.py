@@ -1,5 +1,6 @@
-from marshmallow import Schema, fields, validate, ValidationError
+from marshmallow import Schema, fields, validate, validates, validates_schema, ValidationError
 import re
+from sqlalchemy import or_
 from models.user import User  
 
 # def validate_password(password):
@@ -33,26 +34,28 @@ def validate_email_format(email):
         raise ValidationError("Email must contain a valid domain extension (e.g., .com, .org).")
 
 
-def email_must_not_exist(email):
-    if User.query.filter_by(email=email).first():
-        raise ValidationError("This email is already registered.")
-
-
-def email_must_exist(email):
-    if not User.query.filter_by(email=email).first():
-        raise ValidationError("No account found with this email.")
-
 def validate_phone(phone):
     if not re.match(r"^\+?\d{7,15}$", phone):
         raise ValidationError(
             "Phone number must contain only digits"
         )
     
-def phone_must_not_exist(phone):
-    if User.query.filter_by(phone=phone).first():
-        raise ValidationError("This phone is already registered.")
 
 
+class ResolvesUser:
+    """Looks up the account for ``email`` once and keeps it on ``self.user``.
+
+    Instantiate these schemas per request, the resolved user is request state.
+    """
+
+    user = None
+
+    @validates("email")
+    def email_must_exist(self, value, **kwargs):
+        self.user = User.query.filter_by(email=value).first()
+        if not self.user:
+            raise ValidationError("No account found with this email.")
+
 
 class UserSchema(Schema):
     name = fields.String(
@@ -65,10 +68,7 @@ class UserSchema(Schema):
     )
     email = fields.Email(
         required=True,
-        validate=validate.And(
-            validate_email_format,
-            email_must_not_exist
-        ),
+        validate=validate_email_format,
         error_messages={
             "required": "Email is required.",
             "invalid": "Invalid email format."
@@ -84,25 +84,32 @@ class UserSchema(Schema):
     )
     phone = fields.String(
         required=True,
-        validate=validate.And
-        (
-            validate_phone,
-            phone_must_not_exist
-        ),
+        validate=validate_phone,
         error_messages={
             "required": "Phone number is required.",
             "invalid": "Invalid phone number format."
         }
     )
 
-class LoginSchema(Schema):
+    @validates_schema
+    def email_and_phone_must_not_exist(self, data, **kwargs):
+        # One round trip for both uniqueness checks.
+        existing = User.query.filter(
+            or_(User.email == data["email"], User.phone == data["phone"])
+        ).all()
+        errors = {}
+        if any(u.email == data["email"] for u in existing):
+            errors["email"] = ["This email is already registered."]
+        if any(u.phone == data["phone"] for u in existing):
+            errors["phone"] = ["This phone is already registered."]
+        if errors:
+            raise ValidationError(errors)
+
+class LoginSchema(ResolvesUser, Schema):
 
     email = fields.Email(
             required=True,
-            validate=validate.And(
-                validate_email_format,
-                email_must_exist
-            ),
+            validate=validate_email_format,
             error_messages={
                 "required": "Email is required.",
                 "invalid": "Invalid email format."
@@ -117,13 +124,10 @@ class LoginSchema(Schema):
             }
         )
     
-class Reset(Schema):
+class Reset(ResolvesUser, Schema):
     email = fields.Email(
             required=True,
-            validate=validate.And(
-                validate_email_format,
-                email_must_exist     
-            ),
+            validate=validate_email_format,
             error_messages={
                 "required": "Email is required.",
                 "invalid": "Invalid email format."
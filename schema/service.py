@@ -29,12 +29,16 @@ class ServiceSchema(Schema):
 
     image = fields.String(required=False)
 
-    def __init__(self, current_id=None, *args, **kwargs):
+    def __init__(self, current_id=None, current_name=None, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.current_id = current_id
+        self.current_name = current_name
 
     @validates("service")
     def validate_service_unique(self, value, **kwargs):
+        # Keeping (or re-casing) its own name cannot clash with another service.
+        if self.current_name is not None and value.lower() == self.current_name.lower():
+            return
         # Normalize case
         existing = Service.query.filter(func.lower(Service.service) == func.lower(value)).first()
         # Only raise if a different service with the same name exists
@@ -0,0 +1,87 @@
+import importlib.util, os
+import pytest
+from sqlalchemy import text
+from flask_jwt_extended import create_access_token
+from api.search import probe_search_backend
+from app import create_app
+from config import TestingConfig
+from diagnostics.seed import seed
+from extensions import db
+from extensions.query_budget import count_queries
+
+
+@pytest.fixture
+def make_app(tmp_path):
+    """Build an app on a fresh SQLite database seeded with the given sizes."""
+    apps = []
+
+    def make_app(data_rows=50, users=3, services=5):
+        class Config(TestingConfig):
+            SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / f'test{len(apps)}.db'}"
+            SQLALCHEMY_ENGINE_OPTIONS = {}
+            SQLALCHEMY_BINDS = {}
+            # The seeded accounts' hash, so logins do not trigger a rehash.
+            PASSWORD_HASH_METHOD = "pbkdf2:sha256:1000"
+            HASH_EXECUTOR = "inline"
+            METRICS_DIR = None
+
+        app = create_app(Config)
+        with app.app_context():
+            db.create_all()
+            seed(data_rows=data_rows, users=users, services=services)
+        apps.append(app)
+        return app
+
+    yield make_app
+    for app in apps:
+        with app.app_context():
+            db.engine.dispose()
+
+
+@pytest.fixture
+def add_search_indexes():
+    """Add the SQLite FTS table that create_all leaves out, built by the migration's own DDL."""
+    path = os.path.join(os.path.dirname(__file__), os.pardir,
+                        "migrations", "versions", "a3c9e1f04b27_search_indexes_for_data.py")
+    spec = importlib.util.spec_from_file_location("search_migration", path)
+    migration = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(migration)
+
+    def add_search_indexes(app):
+        with app.app_context():
+            for statement in (migration.SQLITE_FTS_TABLE, *migration.SQLITE_FTS_TRIGGERS,
+                              "INSERT INTO data_fts(data_fts) VALUES ('rebuild')", "ANALYZE"):
+                db.session.execute(text(statement))
+            db.session.commit()
+        # The app was built before the table existed.
+        probe_search_backend(app)
+
+    return add_search_indexes
+
+
+@pytest.fixture
+def app(make_app):
+    return make_app()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def auth(app):
+    with app.app_context():
+        return {"Authorization": "Bearer " + create_access_token(identity="1")}
+
+
+@pytest.fixture
+def queries():
+    """Every SQL statement run while the test body executes.
+
+    @query_budget already fails a request that overruns its view's budget
+    (QUERY_BUDGET_MODE is "raise" in TestingConfig); use this to pin a
+    tighter number for one request.
+    """
+    with count_queries() as counter:
+        yield counter
@@ -0,0 +1,25 @@
+from email.utils import formatdate
+
+
+def test_collection_etag_moves_on_delete(client, auth):
+    first = client.get("/api/data", headers=auth)
+    etag = first.headers["ETag"]
+    assert client.get("/api/data", headers={**auth, "If-None-Match": etag}).status_code == 304
+
+    client.delete("/api/data/5", headers=auth)
+    assert client.get("/api/data", headers={**auth, "If-None-Match": etag}).status_code == 200
+
+
+def test_collections_ignore_if_modified_since(client, auth):
+    assert "Last-Modified" not in client.get("/api/data", headers=auth).headers
+
+    client.delete("/api/data/5", headers=auth)
+    since = formatdate(usegmt=True)
+    response = client.get("/api/data", headers={**auth, "If-Modified-Since": since})
+    assert response.status_code == 200
+
+
+def test_rows_answer_if_modified_since(client, auth):
+    last_modified = client.get("/api/data/1", headers=auth).headers["Last-Modified"]
+    response = client.get("/api/data/1", headers={**auth, "If-Modified-Since": last_modified})
+    assert response.status_code == 304
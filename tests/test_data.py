@@ -0,0 +1,36 @@
+import pytest
+
+
+@pytest.mark.parametrize("query", ["per_page=0", "per_page=-1", "per_page=101",
+                                   "paginate=cursor&per_page=0", "paginate=cursor&per_page=5000"])
+def test_listing_rejects_out_of_range_page_sizes(client, auth, query):
+    response = client.get(f"/api/data?{query}", headers=auth)
+    assert response.status_code == 400
+
+
+def test_cursor_listing_pages_through_every_row(client, auth):
+    seen, after = [], None
+    while True:
+        url = "/api/data?paginate=cursor&per_page=20" + (f"&after={after}" if after else "")
+        body = client.get(url, headers=auth).json
+        seen += [row["id"] for row in body["data"]]
+        after = body["next_cursor"]
+        if not after:
+            break
+    assert seen == sorted(seen) and len(seen) == 50
+
+
+@pytest.mark.parametrize("body", [[{"op": "delete", "id": 1}], "operations", 3, None, {"operations": []}])
+def test_bulk_rejects_bodies_without_an_operations_list(client, auth, body):
+    response = client.post("/api/data/bulk", json=body, headers=auth)
+    assert response.status_code == 400
+    assert response.json["error"] == "operations must be a non-empty list"
+
+
+def test_listing_total_follows_committed_writes(client, auth):
+    assert client.get("/api/data", headers=auth).json["total_item"] == 50
+    client.post("/api/data", json={"name": "Counted", "age": 30}, headers=auth)
+    assert client.get("/api/data", headers=auth).json["total_item"] == 51
+    client.post("/api/data/bulk", json={"operations": [{"op": "delete", "id": 1}, {"op": "delete", "id": 2}]},
+                headers=auth)
+    assert client.get("/api/data", headers=auth).json["total_item"] == 49
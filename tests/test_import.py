@@ -0,0 +1,35 @@
+import io
+import pytest
+import api.importer
+
+
+def upload(client, auth, content, name="data.csv"):
+    return client.post("/api/data/import", headers=auth,
+                       data={"file": (io.BytesIO(content), name)}, content_type="multipart/form-data")
+
+
+def total(client, auth):
+    return client.get("/api/data", headers=auth).json["total_item"]
+
+
+def test_import_reports_rejected_lines(client, auth):
+    response = upload(client, auth, "name,age\nAda,36\nBad,abc\n".encode("utf-8-sig"))
+    assert response.status_code == 200
+    assert (response.json["imported"], response.json["failed"]) == (1, 1)
+    assert response.json["errors"][0]["line"] == 3
+
+
+@pytest.mark.parametrize("content,line", [
+    ("name,age\nAda,36\nBob,40\nJosé,41\n".encode("latin-1"), 4),
+    (b'{"name": "Ada", "age": 36}\n{"name": "Jos\xe9", "age": 41}\n', 2),
+    (b"name,age\nAda,36\n" + b"x" * (200 * 1024) + b",1\n", 3),
+], ids=["latin-1 csv", "latin-1 ndjson", "oversized csv field"])
+def test_unreadable_file_imports_nothing(client, auth, monkeypatch, content, line):
+    # Flush a chunk before the bad line to check it is rolled back too.
+    monkeypatch.setattr(api.importer, "IMPORT_CHUNK", 1)
+    name = "data.csv" if content.startswith(b"name") else "data.ndjson"
+
+    response = upload(client, auth, content, name)
+    assert response.status_code == 400
+    assert response.json["errors"][0]["line"] == line
+    assert total(client, auth) == 50
@@ -0,0 +1,11 @@
+import os, subprocess, sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_startup_stays_within_budget(tmp_path):
+    # STARTUP_BUDGET_MS sets the budget, as for the script itself.
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{tmp_path / 'startup.db'}")
+    result = subprocess.run([sys.executable, "-m", "diagnostics.importtime", "--runs", "3"],
+                            cwd=ROOT, env=env, capture_output=True, text=True)
+    assert result.returncode == 0, result.stdout + result.stderr
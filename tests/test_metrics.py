@@ -0,0 +1,36 @@
+import os
+from extensions.metrics import ARCHIVE, Metrics, Registry, archive_process, clear_directory, write_snapshot
+
+DEAD_PIDS = (999991, 999992)
+
+
+def worker_snapshot(requests):
+    registry = Registry()
+    registry.inc("requests_total", requests, endpoint="api.get_data")
+    registry.observe("latency_seconds", 0.02, endpoint="api.get_data")
+    return dict(registry.snapshot(), samples=[["pool_in_use", "gauge", [], 3]])
+
+
+def test_exited_workers_are_archived_with_their_counters(tmp_path):
+    directory = str(tmp_path)
+    for pid, requests in zip(DEAD_PIDS, (2, 5)):
+        write_snapshot(os.path.join(directory, f"{pid}.json"), worker_snapshot(requests))
+        archive_process(directory, pid)
+
+    assert sorted(os.listdir(directory)) == [ARCHIVE]
+    metrics = Metrics()
+    metrics.directory = directory
+    text = metrics.render()
+    assert 'requests_total{endpoint="api.get_data"} 7' in text
+    assert 'latency_seconds_count{endpoint="api.get_data"} 2' in text
+    assert "pool_in_use" not in text
+
+
+def test_clear_directory_removes_every_snapshot(tmp_path):
+    directory = str(tmp_path)
+    write_snapshot(os.path.join(directory, f"{DEAD_PIDS[0]}.json"), worker_snapshot(1))
+    write_snapshot(os.path.join(directory, ARCHIVE), worker_snapshot(1))
+    (tmp_path / "123.json.tmp").write_text("{")
+
+    clear_directory(directory)
+    assert os.listdir(directory) == []
@@ -0,0 +1,13 @@
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from extensions import db
+
+
+def test_failed_statements_leave_no_start_time_behind(app):
+    with app.app_context(), db.engine.connect() as conn:
+        for _ in range(3):
+            with pytest.raises(OperationalError):
+                conn.execute(text("SELECT * FROM missing_table"))
+        conn.execute(text("SELECT 1"))
+        assert conn.info["query_start"] == []
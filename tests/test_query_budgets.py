@@ -0,0 +1,73 @@
+import pytest
+from extensions.query_budget import QueryBudgetExceeded, count_queries, query_budget
+from diagnostics.seed import SEED_PASSWORD
+from models.data import Data
+
+# Every view with a @query_budget. Under TestingConfig an overrun raises
+# QueryBudgetExceeded out of the request, failing the test.
+BUDGETED = [
+    ("GET", "/api/data", None),
+    ("GET", "/api/data?search=ka", None),
+    ("GET", "/api/data?search=20-30", None),
+    ("GET", "/api/data?paginate=cursor", None),
+    ("GET", "/api/data?approx_count=true", None),
+    ("GET", "/api/data/1", None),
+    ("POST", "/api/data", {"json": {"name": "Budget", "age": 30}}),
+    ("PUT", "/api/data/1", {"data": {"age": "55"}}),
+    ("DELETE", "/api/data/2", None),
+    ("GET", "/service", None),
+    ("GET", "/service/1", None),
+    ("POST", "/service", {"json": {"service": "Budget service", "price": 300}}),
+    ("PUT", "/service/1", {"data": {"service": "Renamed service", "price": "400"}}),
+    ("DELETE", "/service/2", None),
+    ("GET", "/auth/register", None),
+    ("POST", "/auth/register", {"json": {"name": "Budget", "email": "budget@example.com",
+                                         "password": "abcd", "phone": "+1234567890"}}),
+]
+
+
+@pytest.mark.parametrize("method,url,body", BUDGETED)
+def test_views_stay_within_budget(client, auth, method, url, body):
+    response = client.open(url, method=method, headers=auth, **(body or {}))
+    assert response.status_code < 400, response.get_data(as_text=True)
+
+
+def test_listing_runs_two_queries_once_counted(client, auth):
+    client.get("/api/data", headers=auth)
+    with count_queries() as queries:
+        response = client.get("/api/data?page=2", headers=auth)
+    assert response.status_code == 200
+    # The ETag validator and the page; the total comes from the count cache.
+    assert queries.count <= 2, queries.statements
+
+
+def test_login_runs_one_query(client, queries):
+    response = client.post("/auth/login", json={"email": "user42_0@example.com", "password": SEED_PASSWORD})
+    assert response.status_code == 200
+    assert queries.count <= 1, queries.statements
+
+
+def test_update_returns_stored_types(client, auth):
+    response = client.put("/api/data/1", data={"age": "55"}, headers=auth)
+    assert response.json["data"]["age"] == 55
+
+
+def test_overrun_fails_the_request(app):
+    @query_budget(0)
+    def greedy():
+        return {"rows": Data.query.count()}
+
+    app.add_url_rule("/greedy", view_func=greedy)
+    with pytest.raises(QueryBudgetExceeded):
+        app.test_client().get("/greedy")
+
+
+def test_fts_search_runs_no_probe(app, client, auth, add_search_indexes):
+    add_search_indexes(app)
+    with count_queries() as queries:
+        response = client.get("/api/data?search=kara", headers=auth)
+    assert response.status_code == 200
+    # Validator, count and page; whether data_fts exists was read at startup.
+    assert queries.count <= 3, queries.statements
+    assert any("MATCH" in statement for statement in queries.statements)
+    assert not any("sqlite_master" in statement for statement in queries.statements)
@@ -0,0 +1,16 @@
+import pytest
+from diagnostics.plans import check_plans
+
+
+@pytest.fixture
+def plans_app(make_app, add_search_indexes):
+    # Enough rows that the planner prefers indexes.
+    app = make_app(data_rows=20000, users=200, services=50)
+    add_search_indexes(app)
+    return app
+
+
+def test_hot_queries_use_indexes(plans_app):
+    with plans_app.app_context():
+        violations = check_plans()
+    assert not violations, "\n".join(f"{name}: SEQ SCAN on {table}: {sql}" for name, table, sql in violations)
@@ -0,0 +1,29 @@
+from extensions.query_budget import count_queries
+
+
+def test_warm_catalog_runs_no_queries(client, auth):
+    etag = client.get("/service", headers=auth).headers["ETag"]
+    with count_queries() as queries:
+        assert client.get("/service", headers=auth).status_code == 200
+        assert client.get("/service", headers={**auth, "If-None-Match": etag}).status_code == 304
+    assert queries.count == 0, queries.statements
+
+
+def test_catalog_follows_committed_writes(client, auth):
+    before = client.get("/service", headers=auth)
+    client.post("/service", json={"service": "Fresh service", "price": 300}, headers=auth)
+    after = client.get("/service", headers={**auth, "If-None-Match": before.headers["ETag"]})
+    assert after.status_code == 200
+    assert len(after.json) == len(before.json) + 1
+
+    client.delete("/service/1", headers=auth)
+    assert len(client.get("/service", headers=auth).json) == len(before.json)
+
+
+def test_missing_pillow_is_logged_at_startup(app, monkeypatch, caplog):
+    import api.service
+    from app import create_app
+
+    monkeypatch.setattr(api.service, "HAS_PILLOW", False)
+    create_app(type("Config", (), dict(app.config)))
+    assert "Pillow is not installed" in caplog.text
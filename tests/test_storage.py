@@ -0,0 +1,14 @@
+import threading
+
+
+def test_building_the_app_starts_no_sweeper(app):
+    from app import create_app
+
+    create_app(type("Config", (), dict(app.config, UPLOAD_GC_INTERVAL=60)))
+    assert not any(thread.name == "uploads-gc" for thread in threading.enumerate())
+
+
+def test_sweep_command_needs_an_interval(app):
+    result = app.test_cli_runner().invoke(args=["uploads", "sweep"])
+    assert result.exit_code == 2
+    assert "UPLOAD_GC_INTERVAL" in result.output